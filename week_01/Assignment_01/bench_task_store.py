@@ -0,0 +1,93 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from task_store import TaskStore
+
+
+def list_baseline(n_ops, seed=0):
+    """The original list-based store: every complete/delete is a full scan."""
+    rng = random.Random(seed)
+    tasks = []
+    start = time.perf_counter()
+    for i in range(n_ops):
+        r = rng.random()
+        if r < 0.5 or not tasks:
+            task_id = tasks[-1]["id"] + 1 if tasks else 1
+            tasks.append({"id": task_id, "description": f"task {i}", "completed": False})
+        elif r < 0.75:
+            task_id = rng.randint(1, tasks[-1]["id"])
+            for task in tasks:
+                if task["id"] == task_id:
+                    task["completed"] = True
+                    break
+        else:
+            task_id = rng.randint(1, tasks[-1]["id"])
+            tasks = [task for task in tasks if task["id"] != task_id]
+    return time.perf_counter() - start
+
+
+def run_ops(store, n_ops, seed=0):
+    """Runs a 50% add / 25% complete / 25% delete mix against the store."""
+    rng = random.Random(seed)
+    counts = {"add": 0, "complete": 0, "delete": 0, "miss": 0}
+    start = time.perf_counter()
+    for i in range(n_ops):
+        r = rng.random()
+        if r < 0.5 or not store.last_id:
+            store.add(f"task {i}")
+            counts["add"] += 1
+        elif r < 0.75:
+            if store.complete(rng.randint(1, store.last_id)):
+                counts["complete"] += 1
+            else:
+                counts["miss"] += 1
+        else:
+            if store.delete(rng.randint(1, store.last_id)):
+                counts["delete"] += 1
+            else:
+                counts["miss"] += 1
+    return time.perf_counter() - start, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the log-backed task store.")
+    parser.add_argument("--ops", type=int, default=1_000_000, help="Number of add/complete/delete operations.")
+    parser.add_argument("--baseline-ops", type=int, default=20_000,
+                        help="Operations to run against the old list-based store (0 to skip).")
+    parser.add_argument("--autoflush", action="store_true", help="Flush the log after every write.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tasks.log")
+
+        store = TaskStore(path, autoflush=args.autoflush)
+        elapsed, counts = run_ops(store, args.ops)
+        store.close()
+        print(f"TaskStore: {args.ops:,} ops in {elapsed:.2f}s ({args.ops / elapsed:,.0f} ops/s)")
+        print(f"  adds={counts['add']:,} completes={counts['complete']:,} "
+              f"deletes={counts['delete']:,} misses={counts['miss']:,}")
+        print(f"  log size: {os.path.getsize(path) / 1e6:.1f} MB, live tasks: {len(store):,}")
+
+        start = time.perf_counter()
+        replayed = TaskStore(path)
+        replay_time = time.perf_counter() - start
+        assert len(replayed) == len(store), "replayed store does not match"
+        print(f"  replay: {replay_time:.2f}s for {replayed._log_entries:,} log entries")
+
+        start = time.perf_counter()
+        replayed.compact()
+        print(f"  compact: {time.perf_counter() - start:.2f}s, "
+              f"log size now {os.path.getsize(path) / 1e6:.1f} MB")
+        replayed.close()
+
+    if args.baseline_ops:
+        elapsed = list_baseline(args.baseline_ops)
+        print(f"List baseline: {args.baseline_ops:,} ops in {elapsed:.2f}s "
+              f"({args.baseline_ops / elapsed:,.0f} ops/s)")
+
+
+if __name__ == "__main__":
+    main()
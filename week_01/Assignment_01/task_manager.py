@@ -1,15 +1,22 @@
+import argparse
+import os
+import sys
+import time
+from task_store import TaskStore
+ 
 # Step 1: Define the Data Structure
-tasks = []
+# Tasks are kept in a store keyed by ID and persisted to an append-only log,
+# so they survive restarts. Set TASKS_FILE to use a different log.
+tasks = TaskStore(os.getenv("TASKS_FILE", "tasks.log"))
  
 # Step 2: Implement Core Functions
  
-def add_task(description):
-    """Adds a new task to the tasks list."""
-    # Generate a unique task ID. If tasks list is empty, start with 1, otherwise increment the last task's ID.
-    task_id = tasks[-1]["id"] + 1 if tasks else 1
-    task = {"id": task_id, "description": description, "completed": False}
-    tasks.append(task)
-    print(f"Task '{description}' added with ID {task_id}.")
+def add_task(description, verbose=True):
+    """Adds a new task to the task store and returns its ID."""
+    task = tasks.add(description)
+    if verbose:
+        print(f"Task '{description}' added with ID {task['id']}.")
+    return task["id"]
  
 def view_tasks():
     """Displays all tasks with their ID, description, and completion status."""
@@ -23,29 +30,90 @@ def view_tasks():
         print(f"{task['id']}: {task['description']} [{status}]")
     print("------------------")
  
-def mark_completed(task_id):
-    """Marks a task as completed given its ID."""
-    found = False
-    for task in tasks:
-        if task["id"] == task_id:
-            task["completed"] = True
+def mark_completed(task_id, verbose=True):
+    """Marks a task as completed given its ID. Returns False if it does not exist."""
+    found = tasks.complete(task_id)
+    if verbose:
+        if found:
             print(f"Task ID {task_id} marked as completed.")
-            found = True
-            break
-    if not found:
-        print(f"No task found with ID {task_id}.")
+        else:
+            print(f"No task found with ID {task_id}.")
+    return found
  
-def delete_task(task_id):
-    """Deletes a task given its ID."""
-    global tasks # Declare 'tasks' as global to modify the list directly
-    initial_task_count = len(tasks)
-    tasks = [task for task in tasks if task["id"] != task_id]
-    if len(tasks) < initial_task_count:
-        print(f"Task ID {task_id} deleted.")
-    else:
-        print(f"No task found with ID {task_id}.")
+def delete_task(task_id, verbose=True):
+    """Deletes a task given its ID. Returns False if it does not exist."""
+    found = tasks.delete(task_id)
+    if verbose:
+        if found:
+            print(f"Task ID {task_id} deleted.")
+        else:
+            print(f"No task found with ID {task_id}.")
+    return found
  
-# Step 3: Create the User Interface Loop
+# Step 3: Batch Mode
+ 
+def run_batch(lines, max_errors=20):
+    """
+    Applies commands in bulk, one per line:
+        add <description>
+        complete <task id>
+        delete <task id>
+    Blank lines and lines starting with '#' are skipped. Nothing is printed per
+    command; problems are collected and reported once in the summary.
+    """
+    counts = {"add": 0, "complete": 0, "delete": 0}
+    errors = []
+    error_count = 0
+    start = time.perf_counter()
+    tasks.autoflush = False  # one flush at the end instead of one per command
+    try:
+        for line_no, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            command, _, arg = line.partition(" ")
+            command = command.lower()
+            arg = arg.strip()
+            if command == "add":
+                if arg:
+                    add_task(arg, verbose=False)
+                    counts["add"] += 1
+                    continue
+                problem = "task description cannot be empty"
+            elif command in ("complete", "delete"):
+                try:
+                    task_id = int(arg)
+                except ValueError:
+                    problem = f"invalid task ID '{arg}'"
+                else:
+                    apply = mark_completed if command == "complete" else delete_task
+                    if apply(task_id, verbose=False):
+                        counts[command] += 1
+                        continue
+                    problem = f"no task found with ID {task_id}"
+            else:
+                problem = f"invalid command '{command}'"
+            error_count += 1
+            if len(errors) < max_errors:
+                errors.append(f"  line {line_no}: {problem}")
+    finally:
+        tasks.flush()
+        tasks.autoflush = True
+    elapsed = time.perf_counter() - start
+ 
+    report = [
+        f"Batch finished in {elapsed:.2f}s: {counts['add']} added, {counts['complete']} completed, "
+        f"{counts['delete']} deleted, {error_count} failed. {len(tasks)} tasks in store."
+    ]
+    if errors:
+        report.append("Errors:")
+        report.extend(errors)
+        if error_count > len(errors):
+            report.append(f"  ... and {error_count - len(errors)} more")
+    print("\n".join(report))
+    return counts, error_count
+ 
+# Step 4: Create the User Interface Loop
  
 def main():
     """Main function to run the command-line task manager."""
@@ -82,10 +150,23 @@ def main():
                 print("Invalid input. Please enter a numerical task ID.")
         elif choice == "exit":
             print("Exiting Task Manager. Goodbye!")
+            tasks.close()
             break
         else:
             print("Invalid command. Please choose from 'add', 'view', 'complete', 'delete', or 'exit'.")
  
-# Step 4: Run and Test
+# Step 5: Run and Test
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Command-line task manager.")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="Apply commands from FILE ('-' for stdin) without prompting, then exit.")
+    args = parser.parse_args()
+    if args.batch:
+        if args.batch == "-":
+            run_batch(sys.stdin)
+        else:
+            with open(args.batch, "r", encoding="utf-8") as f:
+                run_batch(f)
+        tasks.close()
+    else:
+        main()
\ No newline at end of file
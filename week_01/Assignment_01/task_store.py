@@ -0,0 +1,180 @@
+import json
+import os
+import threading
+
+
+class TaskStore:
+    """
+    Task store keyed by task ID, backed by an append-only log file.
+
+    Tasks live in a dict (which keeps insertion order), so lookups, completes
+    and deletes are O(1). Every change is appended to the log as one JSON line
+    and the log is replayed on startup. When too many log entries no longer
+    describe a live task, the log is rewritten in a background thread.
+    """
+
+    def __init__(self, path="tasks.log", compact_ratio=0.5, compact_min_entries=10_000, autoflush=True):
+        self.path = path
+        self.compact_ratio = compact_ratio
+        self.compact_min_entries = compact_min_entries
+        self.autoflush = autoflush
+        self.tasks = {}
+        self.last_id = 0
+        self._log_entries = 0
+        self._lock = threading.RLock()
+        self._compactor = None
+        self._pending = None  # records written while a compaction is running
+        torn = self._replay()
+        self._log = open(self.path, "a", encoding="utf-8")
+        if torn:
+            self._log.write("\n")
+
+    # --- Log replay / writing ---
+    def _replay(self):
+        """Rebuilds the tasks from the log. Returns True if the last line was torn."""
+        if not os.path.exists(self.path):
+            return False
+        line = ""
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash mid-write; everything before it is intact.
+                    continue
+                self._apply(record)
+                self._log_entries += 1
+        return bool(line) and not line.endswith("\n")
+
+    def _apply(self, record):
+        op, task_id = record["op"], record["id"]
+        if op == "add":
+            self.tasks[task_id] = {"id": task_id, "description": record["d"], "completed": record.get("c", False)}
+            self.last_id = max(self.last_id, task_id)
+        elif op == "done":
+            task = self.tasks.get(task_id)
+            if task is not None:
+                task["completed"] = True
+        elif op == "del":
+            self.tasks.pop(task_id, None)
+        elif op == "seq":
+            self.last_id = max(self.last_id, task_id)
+
+    def _append(self, line):
+        # Callers pass a ready JSON line; formatting it by hand is much cheaper than json.dumps on a dict.
+        self._log.write(line)
+        if self.autoflush:
+            self._log.flush()
+        if self._pending is not None:
+            self._pending.append(line)
+        self._log_entries += 1
+        self._maybe_compact()
+
+    # --- Public API ---
+    def add(self, description):
+        """Adds a task and returns it."""
+        with self._lock:
+            self.last_id += 1
+            task = {"id": self.last_id, "description": description, "completed": False}
+            self.tasks[self.last_id] = task
+            self._append(f'{{"op":"add","id":{self.last_id},"d":{json.dumps(description)}}}\n')
+            return task
+
+    def complete(self, task_id):
+        """Marks a task as completed. Returns False if the ID is unknown."""
+        with self._lock:
+            task = self.tasks.get(task_id)
+            if task is None:
+                return False
+            if not task["completed"]:
+                task["completed"] = True
+                self._append(f'{{"op":"done","id":{task_id}}}\n')
+            return True
+
+    def delete(self, task_id):
+        """Deletes a task. Returns False if the ID is unknown."""
+        with self._lock:
+            if self.tasks.pop(task_id, None) is None:
+                return False
+            self._append(f'{{"op":"del","id":{task_id}}}\n')
+            return True
+
+    def get(self, task_id):
+        return self.tasks.get(task_id)
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def __iter__(self):
+        with self._lock:
+            snapshot = list(self.tasks.values())
+        return iter(snapshot)
+
+    def flush(self):
+        with self._lock:
+            self._log.flush()
+
+    def close(self):
+        """Waits for a running compaction and flushes the log."""
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+        with self._lock:
+            self._log.close()
+
+    # --- Compaction ---
+    def dead_entries(self):
+        return self._log_entries - len(self.tasks)
+
+    def _maybe_compact(self):
+        if self._compactor is not None or self._log_entries < self.compact_min_entries:
+            return
+        if self.dead_entries() / self._log_entries <= self.compact_ratio:
+            return
+        self._start_compaction()
+
+    def _start_compaction(self):
+        # Take the snapshot under the lock; the slow file write happens off it.
+        snapshot = [
+            (task["id"], task["description"], task["completed"]) for task in self.tasks.values()
+        ]
+        self._pending = []
+        self._compactor = threading.Thread(
+            target=self._compact, args=(snapshot, self.last_id), name="task-log-compactor", daemon=True
+        )
+        self._compactor.start()
+
+    def compact(self):
+        """Rewrites the log synchronously so it only holds live tasks."""
+        with self._lock:
+            if self._compactor is None:
+                self._start_compaction()
+            compactor = self._compactor
+        compactor.join()
+
+    def _compact(self, snapshot, last_id):
+        tmp_path = self.path + ".compact"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(f'{{"op":"seq","id":{last_id}}}\n')
+                for task_id, description, completed in snapshot:
+                    flag = ',"c":true' if completed else ""
+                    f.write(f'{{"op":"add","id":{task_id},"d":{json.dumps(description)}{flag}}}\n')
+                # Swap logs under the lock so no change slips in between copying and replacing.
+                with self._lock:
+                    f.writelines(self._pending)
+                    f.flush()
+                    os.fsync(f.fileno())
+                    self._log.close()
+                    os.replace(tmp_path, self.path)
+                    self._log = open(self.path, "a", encoding="utf-8")
+                    self._log_entries = 1 + len(snapshot) + len(self._pending)
+        except OSError as e:
+            print(f"Log compaction failed, keeping the old log: {e}")
+            with self._lock:
+                if self._log.closed:
+                    self._log = open(self.path, "a", encoding="utf-8")
+        finally:
+            with self._lock:
+                self._pending = None
+                self._compactor = None
@@ -1,5 +1,9 @@
 import os
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
 from openai import AzureOpenAI
+from instruction_cache import InstructionCache, make_key
  
 # Step 1: Mock Input Data
 task_descriptions = [
@@ -12,23 +16,19 @@ task_descriptions = [
  
 # Step 2: OpenAI Azure Client Setup
 # Ensure these environment variables are set before running the script:
-os.environ["AZURE_OPENAI_ENDPOINT"] = "https://aiportalapi.stu-platform.live/jpe"
-os.environ["AZURE_OPENAI_API_KEY"] = ""
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://aiportalapi.stu-platform.live/jpe")
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "")
 client = AzureOpenAI(
     api_version="2024-07-01-preview", # Use the latest stable API version or the one specified
     azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
     api_key=os.getenv("AZURE_OPENAI_API_KEY"),
 )
-deployment_name = "GPT-4o-mini" # Or your specific deployment name, e.g., "gpt-35-turbo", "gpt-4"
+deployment_name = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "GPT-4o-mini") # Or your specific deployment name, e.g., "gpt-35-turbo", "gpt-4"
  
-def generate_instruction(task: str) -> str:
-    """
-    Generates step-by-step work instructions for a given manufacturing task
-    using Azure ChatOpenAI.
-    """
-    # Key to the solution: The carefully crafted prompt.
-    # We define the LLM's "persona" and the desired output format.
-    prompt = f"""
+# Key to the solution: The carefully crafted prompt.
+# We define the LLM's "persona" and the desired output format.
+SYSTEM_PROMPT = "You are a highly detailed and safety-conscious automotive manufacturing expert."
+PROMPT_TEMPLATE = """
     You are an expert automotive manufacturing supervisor, safety officer, and quality inspector combined.
     Your goal is to generate extremely clear, concise, and safe step-by-step work instructions
     for an assembly line worker, technician, or quality inspector.
@@ -45,28 +45,86 @@ def generate_instruction(task: str) -> str:
  
     Work Instructions:
     """
-   
+TEMPERATURE = 0.2 # Lower temperature for more deterministic and focused output
+MAX_TOKENS = 500 # Limit output length to prevent overly verbose instructions
+ 
+# Generated instructions are cached on disk, keyed by everything that affects the output.
+# Set INSTRUCTION_CACHE to an empty string to disable the cache.
+CACHE_PATH = os.getenv("INSTRUCTION_CACHE", "instruction_cache.sqlite")
+cache = InstructionCache(CACHE_PATH) if CACHE_PATH else None
+ 
+def generate_instruction(task: str) -> str:
+    """
+    Generates step-by-step work instructions for a given manufacturing task
+    using Azure ChatOpenAI. Results for unchanged inputs are served from the cache.
+    """
+    key = make_key(task, SYSTEM_PROMPT + PROMPT_TEMPLATE, deployment_name, TEMPERATURE, MAX_TOKENS)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+ 
+    prompt = PROMPT_TEMPLATE.format(task=task)
     try:
         response = client.chat.completions.create(
             model=deployment_name,
             messages=[
-                {"role": "system", "content": "You are a highly detailed and safety-conscious automotive manufacturing expert."}, # System message to set the tone
+                {"role": "system", "content": SYSTEM_PROMPT}, # System message to set the tone
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.2, # Lower temperature for more deterministic and focused output
-            max_tokens=500 # Limit output length to prevent overly verbose instructions
+            temperature=TEMPERATURE,
+            max_tokens=MAX_TOKENS
         )
-        return response.choices[0].message.content.strip()
+        instructions = response.choices[0].message.content.strip()
     except Exception as e:
         print(f"An error occurred while generating instructions for task '{task}': {e}")
         return "Failed to generate instructions."
+    if cache is not None:
+        cache.put(key, instructions, SYSTEM_PROMPT + PROMPT_TEMPLATE)
+    return instructions
+ 
+def timed_instruction(task: str) -> dict:
+    """Runs generate_instruction for one task and records how long it took."""
+    start = time.perf_counter()
+    instructions = generate_instruction(task)
+    return {"task": task, "instructions": instructions, "latency": time.perf_counter() - start}
+ 
+def generate_instructions(tasks: list, max_concurrency: int = 8) -> list:
+    """
+    Generates instructions for many tasks concurrently, with at most
+    `max_concurrency` requests in flight. Results come back in input order.
+    Failures are handled per task by generate_instruction, so one bad task
+    does not stop the others.
+    """
+    if max_concurrency <= 1:
+        return [timed_instruction(task) for task in tasks]
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        return list(executor.map(timed_instruction, tasks))
  
 # Step 3: Example Run
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate work instructions for the task catalog.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum number of requests in flight.")
+    parser.add_argument("--clear-cache", action="store_true", help="Drop all cached instructions before running.")
+    args = parser.parse_args()
+ 
+    if cache is not None:
+        # Entries from an older prompt template can never be hit again, so drop them explicitly.
+        removed = cache.invalidate() if args.clear_cache else cache.invalidate(keep_template=SYSTEM_PROMPT + PROMPT_TEMPLATE)
+        if removed:
+            print(f"Removed {removed} cached instructions.")
+ 
     print("Generating Work Instructions for New Car Model Tasks...\n")
-    for i, task in enumerate(task_descriptions):
-        print(f"--- Processing Task {i+1}/{len(task_descriptions)} ---")
-        print(f"Task Description: {task}")
-        instructions = generate_instruction(task)
-        print(f"Generated Work Instructions:\n{instructions}\n")
-        print("-" * 50) # Separator
\ No newline at end of file
+    start = time.perf_counter()
+    results = generate_instructions(task_descriptions, max_concurrency=args.concurrency)
+    for i, result in enumerate(results):
+        print(f"--- Task {i+1}/{len(results)} ({result['latency']:.2f}s) ---")
+        print(f"Task Description: {result['task']}")
+        print(f"Generated Work Instructions:\n{result['instructions']}\n")
+        print("-" * 50) # Separator
+    print(f"Generated {len(results)} instructions in {time.perf_counter() - start:.2f}s.")
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate), "
+              f"{stats['entries']} entries, {stats['bytes'] / 1024:.1f} KB, {stats['evictions']} evicted")
+        cache.close()
\ No newline at end of file
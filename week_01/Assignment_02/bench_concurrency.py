@@ -0,0 +1,72 @@
+import argparse
+import importlib.util
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from instruction_cache import InstructionCache
+from mock_openai_server import start_mock_server
+
+
+def load_prompt_driven(endpoint):
+    """Imports Promt-driven.py (not importable by name because of the hyphen) pointed at the mock."""
+    os.environ["AZURE_OPENAI_ENDPOINT"] = endpoint
+    os.environ["AZURE_OPENAI_API_KEY"] = "mock-key"
+    os.environ["INSTRUCTION_CACHE"] = ""  # measure raw request throughput; the cache is benchmarked separately
+    path = Path(__file__).with_name("Promt-driven.py")
+    spec = importlib.util.spec_from_file_location("prompt_driven", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def report(name, results, elapsed):
+    latencies = sorted(r["latency"] for r in results)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    failed = sum(r["instructions"] == "Failed to generate instructions." for r in results)
+    print(f"{name:<22} {elapsed:8.2f}s {len(results) / elapsed:9.1f} tasks/s "
+          f"p50={statistics.median(latencies) * 1000:8.3f}ms p95={p95 * 1000:8.3f}ms failed={failed}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential vs concurrent instruction generation against a mock endpoint.")
+    parser.add_argument("--tasks", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock server latency per request, in seconds.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[8, 32, 64])
+    args = parser.parse_args()
+
+    server, endpoint = start_mock_server(latency=args.latency)
+    module = load_prompt_driven(endpoint)
+    tasks = [f"{module.task_descriptions[i % len(module.task_descriptions)]} (station {i})" for i in range(args.tasks)]
+    module.generate_instruction(tasks[0])  # warm up the HTTP connection pool
+
+    print(f"{args.tasks} tasks, mock latency {args.latency * 1000:.0f}ms")
+    start = time.perf_counter()
+    baseline = module.generate_instructions(tasks, max_concurrency=1)
+    sequential = time.perf_counter() - start
+    report("sequential", baseline, sequential)
+
+    for limit in args.concurrency:
+        start = time.perf_counter()
+        results = module.generate_instructions(tasks, max_concurrency=limit)
+        elapsed = time.perf_counter() - start
+        assert [r["task"] for r in results] == tasks, "results are out of order"
+        report(f"concurrency={limit}", results, elapsed)
+        print(f"{'':<22} speedup x{sequential / elapsed:.1f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        module.cache = InstructionCache(os.path.join(tmp, "cache.sqlite"))
+        for name in ("cache cold", "cache warm"):
+            start = time.perf_counter()
+            results = module.generate_instructions(tasks, max_concurrency=args.concurrency[0])
+            report(name, results, time.perf_counter() - start)
+        stats = module.cache.stats()
+        print(f"{'':<22} hits={stats['hits']} misses={stats['misses']} entries={stats['entries']}")
+        module.cache.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def template_hash(template: str) -> str:
+    return hashlib.sha256(template.encode("utf-8")).hexdigest()
+
+
+def make_key(task: str, template: str, deployment: str, temperature: float, max_tokens: int) -> str:
+    """Content address of one generation: the same inputs always map to the same key."""
+    payload = json.dumps([task, template_hash(template), deployment, temperature, max_tokens])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class InstructionCache:
+    """
+    On-disk cache of generated instructions, stored in SQLite.
+
+    All entries are mirrored in an in-memory LRU so a hit is a dict lookup;
+    SQLite is only written on inserts, evictions and when access times are
+    flushed. The total size of cached text is capped at `max_bytes`, evicting
+    the least recently used entries first.
+    """
+
+    def __init__(self, path="instruction_cache.sqlite", max_bytes=50 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, template hash, size), least recently used first
+        self._bytes = 0
+        self._touched = {}  # key -> last access time not yet written to disk
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, template_hash TEXT, value TEXT, size INTEGER, last_used REAL)"
+        )
+        rows = self._conn.execute("SELECT key, template_hash, value, size FROM entries ORDER BY last_used")
+        for key, t_hash, value, size in rows:
+            self._entries[key] = (value, t_hash, size)
+            self._bytes += size
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._touched[key] = time.time()
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, template):
+        size = len(value.encode("utf-8"))
+        t_hash = template_hash(template)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (value, t_hash, size)
+            self._bytes += size
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)", (key, t_hash, value, size, time.time())
+            )
+            evicted = []
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                old_key, (_, _, old_size) = self._entries.popitem(last=False)
+                self._bytes -= old_size
+                self._touched.pop(old_key, None)
+                evicted.append((old_key,))
+            if evicted:
+                self._conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+                self.evictions += len(evicted)
+            self._conn.commit()
+
+    def invalidate(self, keep_template=None):
+        """
+        Drops cached entries. With `keep_template`, only entries generated from
+        a different prompt template are dropped. Returns the number removed.
+        """
+        with self._lock:
+            if keep_template is None:
+                stale = list(self._entries)
+            else:
+                keep = template_hash(keep_template)
+                stale = [key for key, (_, t_hash, _) in self._entries.items() if t_hash != keep]
+            for key in stale:
+                self._bytes -= self._entries.pop(key)[2]
+                self._touched.pop(key, None)
+            self._conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in stale])
+            self._conn.commit()
+            return len(stale)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "evictions": self.evictions,
+            }
+
+    def close(self):
+        """Writes pending access times (so LRU order survives restarts) and closes the database."""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE entries SET last_used = ? WHERE key = ?",
+                [(ts, key) for key, ts in self._touched.items()],
+            )
+            self._touched.clear()
+            self._conn.commit()
+            self._conn.close()
@@ -0,0 +1,68 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockChatHandler(BaseHTTPRequestHandler):
+    """Answers any POST .../chat/completions with a canned completion after a fixed delay."""
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real endpoint
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if not self.path.split("?")[0].endswith("/chat/completions"):
+            self._send(404, {"error": {"message": "not found"}})
+            return
+        request = json.loads(body or b"{}")
+        time.sleep(self.server.latency)
+        with self.server.lock:
+            self.server.request_count += 1
+        prompt = request.get("messages", [{}])[-1].get("content", "")
+        self._send(200, {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": f"1. Mock instruction ({len(prompt)} prompt chars)"},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 8, "total_tokens": len(prompt) // 4 + 8},
+        })
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output readable
+
+
+class MockHTTPServer(ThreadingHTTPServer):
+    """Longer listen backlog than the default 5, for benchmarks that open many connections at once."""
+    request_queue_size = 256
+    daemon_threads = True
+
+
+def start_mock_server(latency=0.05, port=0):
+    """Starts the mock server in a background thread and returns (server, endpoint_url)."""
+    server = MockHTTPServer(("127.0.0.1", port), MockChatHandler)
+    server.latency = latency
+    server.lock = threading.Lock()
+    server.request_count = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    server, url = start_mock_server(port=8765)
+    print(f"Mock Azure OpenAI endpoint running at {url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,76 @@
+import argparse
+import random
+import time
+from pathlib import Path
+
+from chunker import _encoding, chunk_text, count_tokens
+
+
+def old_chunks(transcript, max_chunk_tokens=4000):
+    """The previous packing: 4 characters per token, split on '\\n\\n' only."""
+    approx_char_limit = max_chunk_tokens * 4
+    chunks = []
+    current_chunk = ""
+    for paragraph in transcript.split('\n\n'):
+        if len(current_chunk) + len(paragraph) + 2 < approx_char_limit:
+            current_chunk += (paragraph + "\n\n")
+        else:
+            chunks.append(current_chunk.strip())
+            current_chunk = paragraph + "\n\n"
+    if current_chunk:
+        chunks.append(current_chunk.strip())
+    return chunks
+
+
+def synthetic_transcript(sample, minutes, seed=0):
+    """Builds a long transcript by shuffling the speaker turns of the sample meeting."""
+    rng = random.Random(seed)
+    turns = [line.strip() for line in sample.splitlines() if line.strip().startswith("[")]
+    lines, seconds = [], 0
+    while seconds < minutes * 60:
+        speaker_line = rng.choice(turns).split("] ", 1)[-1]
+        lines.append(f"[{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}] {speaker_line}")
+        seconds += rng.randint(15, 60)
+    return lines
+
+
+def report(name, chunks, max_tokens):
+    sizes = [count_tokens(chunk) for chunk in chunks]
+    over = sum(size > max_tokens for size in sizes)
+    empty = sum(not chunk for chunk in chunks)
+    fill = sum(sizes) / (len(sizes) * max_tokens) if sizes else 0
+    # Empty chunks still cost a call; over-budget ones fail with context_length_exceeded.
+    print(f"  {name:<14} calls={len(chunks):4d} avg fill={fill:6.1%} max={max(sizes, default=0):6d} tokens "
+          f"over budget={over} empty={empty}")
+    return len(chunks) - over - empty
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the old and token-aware transcript chunkers.")
+    parser.add_argument("--minutes", type=int, default=120, help="Length of the synthetic meeting.")
+    parser.add_argument("--max-tokens", type=int, default=4000)
+    parser.add_argument("--overlap-tokens", type=int, default=0)
+    args = parser.parse_args()
+
+    sample = Path(__file__).with_name("meeting.txt").read_text(encoding="utf-8")
+    lines = synthetic_transcript(sample, args.minutes)
+    layouts = {
+        "blank-line paragraphs": "\n\n".join(lines),
+        "whitespace blank lines": "\n \n".join(lines),  # what meeting.txt actually contains
+        "one giant paragraph": " ".join(lines),
+    }
+    counter = "tiktoken " + _encoding.name if _encoding is not None else "regex approximation"
+    print(f"{args.minutes}-minute transcript, budget {args.max_tokens} tokens, counting with {counter}")
+    for layout, transcript in layouts.items():
+        total = count_tokens(transcript)
+        print(f"{layout} ({total:,} tokens, at least {-(-total // args.max_tokens)} calls):")
+        old_usable = report("old packing", old_chunks(transcript, args.max_tokens), args.max_tokens)
+        start = time.perf_counter()
+        chunks = chunk_text(transcript, args.max_tokens, args.overlap_tokens)
+        elapsed = time.perf_counter() - start
+        new_usable = report("token packing", chunks, args.max_tokens)
+        print(f"  {'':<14} usable calls old={old_usable} new={new_usable}, chunked in {elapsed * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
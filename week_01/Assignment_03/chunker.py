@@ -0,0 +1,151 @@
+import re
+
+# --- Token counting ---
+# gpt-4o / gpt-4o-mini use the o200k_base encoding. tiktoken counts tokens
+# locally; if it (or its encoding file) is unavailable we fall back to a
+# regex approximation that splits text the way BPE pre-tokenization does.
+ENCODING_NAME = "o200k_base"
+
+def _load_encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(ENCODING_NAME)
+    except Exception:
+        return None
+
+_encoding = _load_encoding()
+_PIECES = re.compile(r"\w+|[^\w\s]+")
+
+def count_tokens(text: str) -> int:
+    """Counts tokens offline, exactly with tiktoken or approximately without it."""
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    # Roughly one token per word or punctuation run, plus one per extra 6 characters of long words.
+    return sum(1 + (len(piece) - 1) // 6 for piece in _PIECES.findall(text))
+
+# --- Splitting ---
+PARAGRAPH_BREAK = re.compile(r"\r?\n[ \t]*\r?\n")  # blank lines, including ones holding only whitespace
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n")
+SEPARATOR = "\n\n"
+SEPARATOR_TOKENS = 1
+
+def _split_words(text: str, max_tokens: int) -> list:
+    """Last resort for a single sentence over budget: split on whitespace."""
+    pieces, current, current_tokens = [], [], 0
+    for word in text.split():
+        tokens = count_tokens(" " + word)
+        if current and current_tokens + tokens > max_tokens:
+            pieces.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(word)
+        current_tokens += tokens
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+def _paragraph_units(paragraph: str, max_tokens: int):
+    paragraph = paragraph.strip()
+    if not paragraph:
+        return
+    tokens = count_tokens(paragraph)
+    if tokens <= max_tokens:
+        yield paragraph, tokens
+        return
+    for sentence in SENTENCE_BREAK.split(paragraph):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        tokens = count_tokens(sentence)
+        if tokens <= max_tokens:
+            yield sentence, tokens
+        else:
+            for piece in _split_words(sentence, max_tokens):
+                yield piece, count_tokens(piece)
+
+def split_units(text: str, max_tokens: int):
+    """
+    Yields (text, token_count) units that each fit in `max_tokens`: whole
+    paragraphs where possible, otherwise sentences, otherwise word runs.
+    """
+    for paragraph in PARAGRAPH_BREAK.split(text):
+        yield from _paragraph_units(paragraph, max_tokens)
+
+# --- Streaming ---
+def iter_paragraphs(stream, block_size: int = 1 << 20, max_paragraph_chars: int = 4 << 20):
+    """
+    Reads a text stream block by block and yields paragraphs as soon as their
+    closing blank line has been read. Only the unfinished tail is buffered; a
+    paragraph longer than `max_paragraph_chars` is cut at the last sentence end
+    or whitespace so the buffer stays bounded.
+    """
+    tail = ""
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            break
+        buffer = tail + block
+        start = 0
+        for match in PARAGRAPH_BREAK.finditer(buffer):
+            yield buffer[start:match.start()]
+            start = match.end()
+        tail = buffer[start:]
+        if len(tail) > max_paragraph_chars:
+            cut = max(tail.rfind(". ", 0, max_paragraph_chars), tail.rfind("\n", 0, max_paragraph_chars))
+            if cut <= 0:
+                cut = tail.rfind(" ", 0, max_paragraph_chars)
+            if cut <= 0:
+                cut = max_paragraph_chars
+            yield tail[:cut + 1]
+            tail = tail[cut + 1:]
+    if tail:
+        yield tail
+
+def stream_units(paragraphs, max_tokens: int):
+    """split_units for an iterable of paragraphs, e.g. from iter_paragraphs."""
+    for paragraph in paragraphs:
+        yield from _paragraph_units(paragraph, max_tokens)
+
+# --- Packing ---
+def pack_units(units, max_tokens: int, overlap_tokens: int = 0):
+    """
+    Greedily packs (text, tokens) units into chunks of at most `max_tokens`.
+    With `overlap_tokens`, each chunk starts with the trailing units of the
+    previous chunk, up to that many tokens, so context carries across the cut.
+    Yields chunks as soon as they are full.
+    """
+    current, current_tokens = [], 0
+    for unit, tokens in units:
+        needed = tokens + (SEPARATOR_TOKENS if current else 0)
+        if current and current_tokens + needed > max_tokens:
+            yield SEPARATOR.join(text for text, _ in current)
+            carried, carried_tokens = [], 0
+            for text, unit_tokens in reversed(current):
+                if carried_tokens + unit_tokens + SEPARATOR_TOKENS > overlap_tokens:
+                    break
+                carried.insert(0, (text, unit_tokens))
+                carried_tokens += unit_tokens + SEPARATOR_TOKENS
+            # Only keep the overlap if the new unit still fits behind it.
+            if carried_tokens + tokens > max_tokens:
+                carried, carried_tokens = [], 0
+            current, current_tokens = carried, carried_tokens
+            needed = tokens + (SEPARATOR_TOKENS if current else 0)
+        current.append((unit, tokens))
+        current_tokens += needed
+    if current:
+        yield SEPARATOR.join(text for text, _ in current)
+
+def chunk_text(text: str, max_tokens: int = 4000, overlap_tokens: int = 0) -> list:
+    """Splits text into chunks of at most `max_tokens` tokens, packed as full as possible."""
+    if overlap_tokens >= max_tokens:
+        raise ValueError("overlap_tokens must be smaller than max_tokens")
+    return list(pack_units(split_units(text, max_tokens), max_tokens, overlap_tokens))
+
+def stream_chunks(stream, max_tokens: int = 4000, overlap_tokens: int = 0, block_size: int = 1 << 20):
+    """
+    Like chunk_text, but reads from a text stream and yields each chunk as
+    soon as it is full, so memory use does not grow with the input size.
+    """
+    if overlap_tokens >= max_tokens:
+        raise ValueError("overlap_tokens must be smaller than max_tokens")
+    units = stream_units(iter_paragraphs(stream, block_size), max_tokens)
+    yield from pack_units(units, max_tokens, overlap_tokens)
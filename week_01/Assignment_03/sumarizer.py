@@ -1,7 +1,11 @@
 import os
 import argparse
+import time
 from openai import AzureOpenAI
 import textwrap # For handling long texts
+from chunker import chunk_text, stream_chunks
+from tree_reduce import stream_tree_reduce, tree_reduce
+from summary_cache import SummaryCache
 from dotenv import load_dotenv # if using .env file
 # need to export these env variables
 # --- Configuration (from Environment Variables) ---
@@ -41,6 +45,9 @@ except Exception as e:
     print("Please check your AZURE_OPENAI_ENDPOINT and AZURE_OPENAI_API_KEY.")
     exit(1)
  
+# Cached summaries are keyed by this; bump it when the prompts change.
+CACHE_VERSION = "1"
+ 
 # --- Function to call the LLM for summarization ---
 def summarize_text_with_gpt(text_chunk: str) -> str:
     """
@@ -84,60 +91,70 @@ def summarize_text_with_gpt(text_chunk: str) -> str:
         return "Failed to generate summary for this chunk."
  
 # --- Strategy for Handling Large Transcripts ---
-def summarize_long_transcript(transcript: str, max_chunk_tokens: int = 4000) -> str:
+# The map and reduce steps return None on failure so the reducers can skip them.
+def map_chunk(chunk: str):
+    summary = summarize_text_with_gpt(chunk)
+    return None if "Failed to generate summary" in summary else summary
+ 
+def reduce_group(text: str):
+    summary = consolidate_summaries(text)
+    return None if "Failed to generate a comprehensive summary" in summary else summary
+ 
+def summarize_long_transcript(transcript: str, max_chunk_tokens: int = 4000, overlap_tokens: int = 0,
+                              max_concurrency: int = 8) -> str:
     """
     Summarizes a long transcript by splitting it into chunks, summarizing each chunk,
     and then combining/summarizing the individual summaries.
    
     `max_chunk_tokens` should be significantly less than your model's total context window
     (e.g., gpt-4o-mini has 128k, so 4k leaves plenty of room for prompt and output).
+    `overlap_tokens` repeats the end of each chunk at the start of the next one.
+    At most `max_concurrency` API calls run at the same time.
     """
    
-    # A simple token-based chunking might be needed here.
-    # For simplicity, we'll use character-based chunking with an approximation for tokens.
-    # A rough estimate: 1 token is about 4 characters.
-    # So, for 4000 tokens, we'd aim for roughly 16000 characters.
-    # This is a simplification; for production, use a proper token counter.
-   
-    approx_char_limit = max_chunk_tokens * 4
-   
-    # Use textwrap.wrap for basic splitting, trying to break on logical paragraphs/sentences
-    # rather than just hard character limits.
-    # For very large files, a more sophisticated splitter (e.g., from LangChain) would be better.
-   
-    chunks = []
-    current_chunk = ""
-    for paragraph in transcript.split('\n\n'): # Split by double newline to get paragraphs
-        if len(current_chunk) + len(paragraph) + 2 < approx_char_limit: # +2 for potential newlines
-            current_chunk += (paragraph + "\n\n")
-        else:
-            chunks.append(current_chunk.strip())
-            current_chunk = paragraph + "\n\n"
-    if current_chunk:
-        chunks.append(current_chunk.strip())
+    # Token-accurate packing: paragraphs are packed up to the budget, and a
+    # paragraph that is too large on its own is split by sentence (then by words).
+    chunks = chunk_text(transcript, max_chunk_tokens, overlap_tokens)
  
     print(f"Transcript split into {len(chunks)} chunks.")
    
-    individual_summaries = []
-    for i, chunk in enumerate(chunks):
-        print(f"Summarizing chunk {i+1}/{len(chunks)}...")
-        summary_chunk = summarize_text_with_gpt(chunk)
-        if "Failed to generate summary" not in summary_chunk:
-            individual_summaries.append(f"Summary of Part {i+1}:\n{summary_chunk}\n")
-        else:
-            print(f"Skipping chunk {i+1} due to error.")
+    # Chunk summaries run in parallel, then get grouped and re-summarized
+    # level by level until everything fits in one final call.
+    summary, levels = tree_reduce(chunks, map_chunk, reduce_group, max_chunk_tokens, max_workers=max_concurrency)
+    calls = sum(level["calls"] for level in levels)
+    print(f"Summarization finished in {len(levels)} rounds, {calls} API calls, "
+          f"{sum(level['seconds'] for level in levels):.1f}s.")
+    if summary is None:
+        return "Could not generate any summaries from the transcript."
+    return summary
  
-    if not individual_summaries:
+def summarize_transcript_file(path: str, max_chunk_tokens: int = 4000, overlap_tokens: int = 0,
+                              max_concurrency: int = 8, cache: SummaryCache = None) -> str:
+    """
+    Streaming version of summarize_long_transcript for files of any size.
+    The file is read in blocks, each chunk is sent for summarization as soon
+    as it is full, and summaries are reduced incrementally, so memory stays
+    bounded and API calls start before the whole file has been read.
+ 
+    With a `cache`, every chunk summary and reduce step is looked up by the
+    hash of its input first. Chunks are packed greedily from the start of the
+    file, so appending text only changes the last chunk, and a re-run only
+    pays for new chunks and the reduce steps above them.
+    """
+    map_fn, reduce_fn = map_chunk, reduce_group
+    if cache is not None:
+        map_fn, reduce_fn = cache.wrap("map", map_chunk), cache.wrap("reduce", reduce_group)
+    with open(path, "r", encoding="utf-8") as file:
+        chunks = stream_chunks(file, max_chunk_tokens, overlap_tokens)
+        summary, _ = stream_tree_reduce(chunks, map_fn, reduce_fn, max_chunk_tokens, max_workers=max_concurrency)
+    if summary is None:
         return "Could not generate any summaries from the transcript."
+    return summary
  
-    # If there's only one chunk or the combined summaries are short, just return that.
-    combined_summaries_text = "\n".join(individual_summaries)
-    if len(combined_summaries_text) < max_chunk_tokens * 3: # Arbitrary threshold for final summary
-        print("Final summary generated from combined chunks.")
-        return combined_summaries_text
-   
-    # If the combined summaries are still too long, summarize them again.
-    print("\nIndividual summaries are still long. Performing a final meta-summary...")
+def consolidate_summaries(combined_summaries_text: str) -> str:
+    """
+    Consolidates several segment summaries into one comprehensive summary.
+    """
     final_prompt = f"""Consolidate the following individual meeting segment summaries into one comprehensive summary.
     Ensure to include all key points, decisions, and action items from across all segments.
    
@@ -166,22 +183,64 @@ def summarize_long_transcript(transcript: str, max_chunk_tokens: int = 4000) ->
         print(f"An error occurred during final meta-summarization: {e}")
         return "Failed to generate a comprehensive summary."
  
+def print_summary(summary: str):
+    print("\n" + "="*30)
+    print("Meeting Summary:")
+    print("="*30)
+    print(summary)
+    print("="*30 + "\n")
+ 
+def watch_transcript(path: str, args, cache: SummaryCache):
+    """Re-summarizes the transcript whenever it changes on disk, until Ctrl+C."""
+    last_seen = None
+    print(f"Watching {path} for changes every {args.interval}s (Ctrl+C to stop)...")
+    try:
+        while True:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                stat = None
+            if stat is not None and stat.st_size and (stat.st_size, stat.st_mtime) != last_seen:
+                last_seen = (stat.st_size, stat.st_mtime)
+                cache.reset_stats()
+                summary = summarize_transcript_file(path, args.max_chunk_tokens, args.overlap_tokens,
+                                                    args.concurrency, cache)
+                print_summary(summary)
+                print(f"Cache: {cache.hits} reused, {cache.misses} recomputed.")
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+ 
 # --- Main Application Logic (CLI Interface) ---
 def main():
     parser = argparse.ArgumentParser(description="Summarize a meeting transcript using Azure OpenAI GPT models.")
     parser.add_argument("transcript_file", type=str, help="Path to the meeting transcript text file.")
+    parser.add_argument("--max-chunk-tokens", type=int, default=4000, help="Token budget per transcript chunk.")
+    parser.add_argument("--overlap-tokens", type=int, default=0, help="Tokens repeated between consecutive chunks.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum number of API calls in flight.")
+    parser.add_argument("--cache-dir", default=".summary_cache", help="Directory for cached chunk and reduce summaries.")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the API, ignoring cached summaries.")
+    parser.add_argument("--watch", action="store_true", help="Keep running and update the summary as the file grows.")
+    parser.add_argument("--interval", type=float, default=10.0, help="Seconds between checks in --watch mode.")
     args = parser.parse_args()
  
+    cache = None if args.no_cache else SummaryCache(args.cache_dir, namespace=f"{CACHE_VERSION}:{DEPLOYMENT_NAME}")
+    if args.watch:
+        if cache is None:
+            print("Error: --watch relies on the summary cache; drop --no-cache.")
+            return
+        watch_transcript(args.transcript_file, args, cache)
+        return
+ 
     transcript_file_path = args.transcript_file
  
-    # Step 2: Load transcript text from the specified file
+    # Step 2: Check the transcript file; it is streamed rather than loaded in one piece
     try:
-        with open(transcript_file_path, "r", encoding="utf-8") as file:
-            transcript = file.read()
-        if not transcript.strip():
+        size = os.path.getsize(transcript_file_path)
+        if size == 0:
             print("Error: The transcript file is empty.")
             return
-        print(f"Successfully loaded transcript from: {transcript_file_path} (length: {len(transcript)} characters)")
+        print(f"Streaming transcript from: {transcript_file_path} (size: {size} bytes)")
     except FileNotFoundError:
         print(f"Error: Transcript file not found at '{transcript_file_path}'. Please check the path.")
         return
@@ -191,14 +250,17 @@ def main():
  
     # Step 3 & 4: Process and call OpenAI API for summarization
     print("Generating meeting summary...")
-    summary = summarize_long_transcript(transcript)
+    try:
+        summary = summarize_transcript_file(transcript_file_path, args.max_chunk_tokens, args.overlap_tokens,
+                                            args.concurrency, cache)
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"Error reading transcript file: {e}")
+        return
  
     # Step 5: Extract and display summary
-    print("\n" + "="*30)
-    print("Meeting Summary:")
-    print("="*30)
-    print(summary)
-    print("="*30 + "\n")
+    print_summary(summary)
+    if cache is not None:
+        print(f"Cache: {cache.hits} reused, {cache.misses} recomputed.")
  
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,61 @@
+import hashlib
+import os
+import threading
+
+
+class SummaryCache:
+    """
+    On-disk cache of summaries keyed by a SHA-256 of their input.
+
+    Each entry is one small file under `directory`, written atomically, so
+    concurrent workers and interrupted runs never leave a half-written entry.
+    `namespace` should change whenever the prompts or model change.
+    """
+
+    def __init__(self, directory=".summary_cache", namespace=""):
+        self.directory = directory
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, kind, text):
+        digest = hashlib.sha256(f"{self.namespace}\0{kind}\0{text}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + ".txt")
+
+    def get(self, kind, text):
+        path = self._path(kind, text)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, kind, text, value):
+        path = self._path(kind, text)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(value)
+        os.replace(tmp_path, path)
+
+    def wrap(self, kind, fn):
+        """Returns fn with its results cached. Failures (None) are not cached."""
+        def cached(text):
+            value = self.get(kind, text)
+            if value is None:
+                value = fn(text)
+                if value is not None:
+                    self.put(kind, text, value)
+            return value
+        return cached
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = 0
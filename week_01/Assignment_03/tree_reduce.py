@@ -0,0 +1,195 @@
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+
+from chunker import SEPARATOR, SEPARATOR_TOKENS, count_tokens, pack_units
+
+
+def parallel_map(fn, items, executor, label="", log=print):
+    """Runs fn over items on the executor, reporting progress. Results keep input order."""
+    results = [None] * len(items)
+    futures = {executor.submit(fn, item): i for i, item in enumerate(items)}
+    for done, future in enumerate(as_completed(futures), start=1):
+        results[futures[future]] = future.result()
+        log(f"  {label}: {done}/{len(items)} done")
+    return results
+
+
+def tree_reduce(chunks, map_fn, reduce_fn, max_tokens, max_workers=8, max_levels=10, log=print):
+    """
+    Map-reduce summarization as a tree.
+
+    Level 0 runs `map_fn` on every chunk in parallel. Each following level
+    packs the previous summaries into groups of at most `max_tokens` and runs
+    `reduce_fn` on the groups in parallel, until everything fits in a single
+    call; that last call produces the final summary. Both functions return
+    None on failure: failed chunks are skipped, and a failed group keeps its
+    summaries unreduced.
+
+    Returns (summary or None, list of per-level stats).
+    """
+    levels = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        start = time.perf_counter()
+        summaries = parallel_map(map_fn, chunks, executor, label="level 0", log=log)
+        failed = sum(summary is None for summary in summaries)
+        summaries = [
+            f"Summary of Part {i + 1}:\n{summary}" for i, summary in enumerate(summaries) if summary is not None
+        ]
+        levels.append({"level": 0, "calls": len(chunks), "failed": failed, "seconds": time.perf_counter() - start})
+        log(f"Level 0: {len(chunks)} chunks -> {len(summaries)} summaries in {levels[-1]['seconds']:.1f}s")
+        if not summaries:
+            return None, levels
+
+        level = 0
+        while len(summaries) > 1 and count_tokens(SEPARATOR.join(summaries)) > max_tokens:
+            level += 1
+            groups = list(pack_units(((s, count_tokens(s)) for s in summaries), max_tokens))
+            if len(groups) >= len(summaries) or level > max_levels:
+                log(f"Level {level}: summaries no longer shrink, stopping the reduction here.")
+                break
+            start = time.perf_counter()
+            reduced = parallel_map(reduce_fn, groups, executor, label=f"level {level}", log=log)
+            summaries = [r if r is not None else group for r, group in zip(reduced, groups)]
+            failed = sum(r is None for r in reduced)
+            levels.append({"level": level, "calls": len(groups), "failed": failed,
+                           "seconds": time.perf_counter() - start})
+            log(f"Level {level}: {len(groups)} groups reduced in {levels[-1]['seconds']:.1f}s")
+
+    if len(summaries) == 1:
+        return summaries[0], levels
+    combined = SEPARATOR.join(summaries)
+    if count_tokens(combined) > max_tokens:
+        return combined, levels  # best effort: one more call would overflow the context
+    start = time.perf_counter()
+    final = reduce_fn(combined)
+    levels.append({"level": level + 1, "calls": 1, "failed": int(final is None),
+                   "seconds": time.perf_counter() - start})
+    log(f"Final level: consolidated {len(summaries)} summaries in {levels[-1]['seconds']:.1f}s")
+    return final, levels
+
+
+class StreamingTreeReducer:
+    """
+    Tree reduce over a stream of chunks, for inputs too large to hold in memory.
+
+    Chunks are summarized as they arrive, with at most `max_in_flight` map
+    calls outstanding so reading never runs far ahead of the API. Each level
+    keeps only one open group of summaries: once the next summary would push
+    it over `max_tokens`, the group is sent to `reduce_fn` and its result is
+    appended to the level above. Memory therefore stays at roughly one group
+    per level, and the levels grow logarithmically with the input.
+    """
+
+    def __init__(self, map_fn, reduce_fn, max_tokens, max_workers=8, max_in_flight=None, log=print):
+        self.map_fn = map_fn
+        self.reduce_fn = reduce_fn
+        self.max_tokens = max_tokens
+        self.max_in_flight = max_in_flight or 2 * max_workers
+        self.log = log
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.pending = []  # per level: deque of (future, fallback texts) in input order
+        self.groups = []  # per level: open group as a list of (text, tokens)
+        self.calls = []  # per level: number of API calls
+        self.chunks_read = 0
+        self.chunks_summarized = 0
+
+    def _level(self, level):
+        while len(self.pending) <= level:
+            self.pending.append(deque())
+            self.groups.append([])
+            self.calls.append(0)
+
+    def _submit(self, level, fn, text, fallback):
+        self._level(level)
+        self.pending[level].append((self.executor.submit(fn, text), fallback))
+        self.calls[level] += 1
+
+    def _pass_through(self, level, texts):
+        """Queues already-final texts at a level, behind its outstanding calls."""
+        self._level(level)
+        done = Future()
+        done.set_result(None)
+        self.pending[level].append((done, texts))
+
+    def _add(self, level, text):
+        group = self.groups[level]
+        tokens = count_tokens(text)
+        used = sum(t for _, t in group) + len(group) * SEPARATOR_TOKENS
+        if group and used + tokens > self.max_tokens:
+            self._close_group(level)
+        self.groups[level].append((text, tokens))
+
+    def _close_group(self, level):
+        group = [text for text, _ in self.groups[level]]
+        self.groups[level] = []
+        if len(group) == 1:
+            self._pass_through(level + 1, group)
+        else:
+            self._submit(level + 1, self.reduce_fn, SEPARATOR.join(group), group)
+
+    def _drain(self, block=False):
+        """Moves finished results, in order, from each level's queue into its open group."""
+        level = 0
+        while level < len(self.pending):
+            queue = self.pending[level]
+            while queue and (block or queue[0][0].done()):
+                future, fallback = queue.popleft()
+                result = future.result()
+                if level == 0:
+                    self.chunks_summarized += 1
+                    if result is None:
+                        self.log(f"Skipping chunk {self.chunks_summarized} due to error.")
+                        continue
+                    result = f"Summary of Part {self.chunks_summarized}:\n{result}"
+                    self.log(f"  chunk {self.chunks_summarized}/{self.chunks_read} summarized")
+                if result is not None:
+                    self._add(level, result)
+                else:
+                    # A failed reduce keeps its inputs; they get regrouped one level up.
+                    for text in fallback:
+                        self._add(level, text)
+            level += 1
+
+    def add_chunk(self, chunk):
+        """Queues one chunk for summarization, waiting if too many calls are in flight."""
+        while len(self.pending) and len(self.pending[0]) >= self.max_in_flight:
+            wait([self.pending[0][0][0]], return_when=FIRST_COMPLETED)
+            self._drain()
+        self.chunks_read += 1
+        self._submit(0, self.map_fn, chunk, [])
+        self._drain()
+
+    def finish(self):
+        """Waits for all outstanding calls and returns (summary or None, calls per level)."""
+        try:
+            level = 0
+            while level < len(self.pending):
+                self._drain(block=True)
+                top = level == len(self.pending) - 1
+                if not top and self.groups[level]:
+                    self._close_group(level)
+                    self._drain(block=True)
+                level += 1
+            summaries = [text for text, _ in self.groups[-1]] if self.groups else []
+            if not summaries:
+                return None, self.calls
+            if len(summaries) == 1:
+                return summaries[0], self.calls
+            self.calls.append(1)
+            return self.reduce_fn(SEPARATOR.join(summaries)), self.calls
+        finally:
+            self.executor.shutdown()
+
+
+def stream_tree_reduce(chunks, map_fn, reduce_fn, max_tokens, max_workers=8, log=print):
+    """Feeds an iterable of chunks through a StreamingTreeReducer. Returns (summary or None, calls per level)."""
+    start = time.perf_counter()
+    reducer = StreamingTreeReducer(map_fn, reduce_fn, max_tokens, max_workers=max_workers, log=log)
+    for chunk in chunks:
+        reducer.add_chunk(chunk)
+    log(f"Input fully read after {time.perf_counter() - start:.1f}s ({reducer.chunks_read} chunks), "
+        f"waiting for the remaining calls...")
+    summary, calls = reducer.finish()
+    log(f"Reduce finished in {time.perf_counter() - start:.1f}s; map/reduce steps per level: {calls}")
+    return summary, calls
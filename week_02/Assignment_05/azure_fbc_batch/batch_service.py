@@ -0,0 +1,133 @@
+import json
+import os
+import random
+import re
+import shutil
+import threading
+import time
+import uuid
+
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def itinerary_args(request):
+    """The generate_itinerary arguments the offline stand-ins (LocalBatchService, mock_server) answer a request with."""
+    function_call = request.get("function_call")
+    if isinstance(function_call, dict) and function_call.get("arguments"):
+        return json.loads(function_call["arguments"])
+    prompt = request.get("messages", [{}])[-1].get("content", "")
+    match = re.search(r"(\d+)[- ]day.* (?:to|in|for) (.+?)\.?$", prompt)
+    if match:
+        return {"destination": match.group(2), "days": int(match.group(1))}
+    return {"destination": "Paris", "days": 3}
+
+
+class AzureBatchService:
+    """The Azure OpenAI Batch API (needs a Global-Batch deployment): upload, create, poll, download, delete."""
+
+    def __init__(self, client, completion_window="24h"):
+        self.client = client
+        self.completion_window = completion_window
+
+    def upload(self, path):
+        with open(path, "rb") as f:
+            return self.client.files.create(file=f, purpose="batch").id
+
+    def create(self, file_id):
+        batch = self.client.batches.create(input_file_id=file_id, endpoint="/chat/completions",
+                                           completion_window=self.completion_window)
+        return batch.id
+
+    def retrieve(self, batch_id):
+        batch = self.client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        return {
+            "status": batch.status,
+            "output_file_id": batch.output_file_id,
+            "error_file_id": batch.error_file_id,
+            "completed": counts.completed if counts else 0,
+            "total": counts.total if counts else 0,
+        }
+
+    def download(self, file_id, path):
+        self.client.files.content(file_id).write_to_file(path)
+
+    def delete(self, file_id):
+        self.client.files.delete(file_id)
+
+
+class LocalBatchService:
+    """
+    File-based stand-in for the Batch API, for running bulk mode offline.
+    Each uploaded request file is answered in a background thread with
+    generate_itinerary function calls (as the mock server does); a fraction
+    `failure_rate` of requests end up in the error file instead.
+    """
+
+    def __init__(self, directory="local_batches", latency=0.0, failure_rate=0.0):
+        self.directory = directory
+        self.latency = latency  # seconds per request
+        self.failure_rate = failure_rate
+        self.batches = {}
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, file_id):
+        return os.path.join(self.directory, f"{file_id}.jsonl")
+
+    def upload(self, path):
+        file_id = f"file-{uuid.uuid4().hex}"
+        shutil.copyfile(path, self._path(file_id))
+        return file_id
+
+    def create(self, file_id):
+        batch_id = f"batch-{uuid.uuid4().hex}"
+        with self.lock:
+            self.batches[batch_id] = {"status": "validating", "output_file_id": None, "error_file_id": None,
+                                      "completed": 0, "total": 0}
+        threading.Thread(target=self._run, args=(batch_id, file_id), daemon=True).start()
+        return batch_id
+
+    def _run(self, batch_id, file_id):
+        batch = self.batches[batch_id]
+        output_id, error_id = f"file-{uuid.uuid4().hex}", f"file-{uuid.uuid4().hex}"
+        errors = 0
+        with open(self._path(file_id), encoding="utf-8") as requests, \
+                open(self._path(output_id), "w", encoding="utf-8") as output, \
+                open(self._path(error_id), "w", encoding="utf-8") as error_file:
+            batch["status"] = "in_progress"
+            for line in requests:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                batch["total"] += 1
+                time.sleep(self.latency)
+                if random.random() < self.failure_rate:
+                    errors += 1
+                    error_file.write(json.dumps({
+                        "custom_id": request["custom_id"], "response": None,
+                        "error": {"code": "server_error", "message": "Simulated failure"},
+                    }) + "\n")
+                    continue
+                args = itinerary_args(request["body"])
+                output.write(json.dumps({"custom_id": request["custom_id"], "response": {"status_code": 200, "body": {
+                    "object": "chat.completion",
+                    "choices": [{"index": 0, "finish_reason": "function_call", "message": {
+                        "role": "assistant", "content": None,
+                        "function_call": {"name": "generate_itinerary", "arguments": json.dumps(args)},
+                    }}],
+                }}, "error": None}) + "\n")
+                batch["completed"] += 1
+        if not errors:
+            os.remove(self._path(error_id))
+        batch.update(status="completed", output_file_id=output_id, error_file_id=error_id if errors else None)
+
+    def retrieve(self, batch_id):
+        with self.lock:
+            return dict(self.batches[batch_id])
+
+    def download(self, file_id, path):
+        shutil.copyfile(self._path(file_id), path)
+
+    def delete(self, file_id):
+        os.remove(self._path(file_id))
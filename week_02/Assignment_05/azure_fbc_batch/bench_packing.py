@@ -0,0 +1,34 @@
+import argparse
+import time
+
+from bench_rate_limit import load_itinerary_batch, make_inputs
+from mock_server import start_mock_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Requests, prompt tokens and time per pack size (parallel tool calls).")
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2, help="Mock latency per request, in seconds.")
+    parser.add_argument("--drop-rate", type=float, default=0.02, help="Fraction of tool calls the mock leaves out.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--pack-sizes", type=int, nargs="+", default=[1, 5, 10, 20])
+    args = parser.parse_args()
+
+    server, endpoint = start_mock_server(latency=args.latency, drop_rate=args.drop_rate)
+    module = load_itinerary_batch(endpoint, rpm=1_000_000, tpm=1_000_000_000)
+    inputs = make_inputs(args.items)
+    print(f"{args.items} items, mock latency {args.latency * 1000:.0f}ms, {args.drop_rate:.0%} tool calls dropped")
+    print(f"{'pack size':>9} {'time':>8} {'requests':>9} {'prompt tokens':>14} {'errors':>7}")
+    for pack_size in args.pack_sizes:
+        requests, tokens = server.request_count, server.prompt_tokens
+        start = time.perf_counter()
+        results = module.batch_process(inputs, max_workers=args.concurrency, pack_size=pack_size)
+        elapsed = time.perf_counter() - start
+        assert [r.get("destination") for r in results] == [i["destination"] for i in inputs], "results out of order"
+        print(f"{pack_size:>9} {elapsed:7.2f}s {server.request_count - requests:>9} "
+              f"{server.prompt_tokens - tokens:>14} {sum('error' in r for r in results):>7}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
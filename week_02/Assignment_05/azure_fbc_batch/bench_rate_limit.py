@@ -0,0 +1,76 @@
+import argparse
+import importlib
+import os
+import time
+
+from mock_server import start_mock_server
+
+
+def load_itinerary_batch(endpoint, rpm, tpm):
+    os.environ["AZURE_OPENAI_ENDPOINT"] = endpoint
+    os.environ["AZURE_OPENAI_API_KEY"] = "mock-key"
+    os.environ["AZURE_OPENAI_DEPLOYMENT_NAME"] = "mock"
+    os.environ["AZURE_OPENAI_RPM"] = str(rpm)
+    os.environ["AZURE_OPENAI_TPM"] = str(tpm)
+    import itinerary_batch
+    return importlib.reload(itinerary_batch)
+
+
+def make_inputs(count):
+    destinations = ["Paris", "Tokyo", "CoTo island, Vietnam", "Lisbon", "Hanoi", "Cape Town"]
+    return [{"prompt": "Plan a travel itinerary.", "destination": f"{destinations[i % len(destinations)]} #{i}",
+             "days": 1 + i % 5} for i in range(count)]
+
+
+def sequential_baseline(module, inputs):
+    """The previous batch_process: one request at a time with a 1s sleep after each."""
+    results = []
+    for input_data in inputs:
+        module.call_openai_function(input_data["prompt"], input_data["destination"], input_data["days"])
+        results.append(module.generate_mock_itinerary(input_data["destination"], input_data["days"]))
+        time.sleep(1)
+    return results
+
+
+def run(name, server, fn, count):
+    requests, throttled = server.request_count, server.throttled_count
+    start = time.perf_counter()
+    results = fn()
+    elapsed = time.perf_counter() - start
+    errors = sum("error" in r for r in results)
+    print(f"{name:<24} {elapsed:7.1f}s {count / elapsed:7.2f} items/s  requests={server.request_count - requests:<5} "
+          f"429s={server.throttled_count - throttled:<4} errors={errors}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential + sleep vs rate-limited concurrent itinerary generation.")
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--baseline-items", type=int, default=20, help="Items for the slow sequential baseline.")
+    parser.add_argument("--latency", type=float, default=0.2, help="Mock latency per request, in seconds.")
+    parser.add_argument("--rpm", type=int, default=600, help="Quota enforced by the mock and given to the limiter.")
+    parser.add_argument("--tpm", type=int, default=200000)
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Fraction of random 429s injected by the mock.")
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    server, endpoint = start_mock_server(latency=args.latency, rpm=args.rpm, error_rate=args.error_rate)
+    module = load_itinerary_batch(endpoint, args.rpm, args.tpm)
+    print(f"mock latency {args.latency * 1000:.0f}ms, quota {args.rpm} RPM, {args.error_rate:.0%} random 429s")
+
+    baseline_inputs = make_inputs(args.baseline_items)
+    run("sequential + sleep(1)", server, lambda: sequential_baseline(module, baseline_inputs), len(baseline_inputs))
+
+    inputs = make_inputs(args.items)
+    module.limiter = module.RateLimiter(args.rpm, args.tpm)
+    results = run(f"concurrent x{args.concurrency}", server,
+                  lambda: module.batch_process(inputs, max_workers=args.concurrency), len(inputs))
+    # failed items carry no destination; everything else must come back in input order
+    returned = [r.get("destination", i["destination"]) for r, i in zip(results, inputs)]
+    assert returned == [i["destination"] for i in inputs], "results are out of order"
+    print(f"{'':<24} limiter waited {module.limiter.waited:.1f}s in total, {module.limiter.pauses} Retry-After pauses")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
-import os, time, json
+import os, json, time, argparse
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from dotenv import load_dotenv
 from tenacity import retry, wait_random_exponential, stop_after_attempt, retry_if_exception_type
 from openai import AzureOpenAI, RateLimitError, APIError
+from rate_limiter import RateLimiter, retry_after
+from batch_service import AzureBatchService, LocalBatchService, TERMINAL_STATUSES
 
 # Load environment variables
 load_dotenv()
@@ -10,12 +13,22 @@ API_KEY    = os.getenv("AZURE_OPENAI_API_KEY")
 DEPLOYMENT = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
 
 # Initialize Azure client
+# (its built-in retries are off so that 429s reach the limiter and tenacity below)
 client = AzureOpenAI(
     api_key=API_KEY,
     azure_endpoint=ENDPOINT,
-    api_version="2024-07-01-preview"
+    api_version="2024-07-01-preview",
+    max_retries=0
 )
 
+# Deployment quota, shared by all worker threads
+limiter = RateLimiter(
+    rpm=int(os.getenv("AZURE_OPENAI_RPM", 60)),
+    tpm=int(os.getenv("AZURE_OPENAI_TPM", 10000))
+)
+SYSTEM_PROMPT = "You are a travel assistant that returns structured itineraries."
+COMPLETION_TOKENS_ESTIMATE = 150
+
 # Function calling schema
 functions = [{
     "name": "generate_itinerary",
@@ -36,31 +49,69 @@ functions = [{
     }
 }]
 
-# Retry-enabled API wrapper
-@retry(
-    retry=retry_if_exception_type((RateLimitError, APIError)),
-    wait=wait_random_exponential(min=1, max=10),
-    stop=stop_after_attempt(5),
-    reraise=True
-)
-def call_openai_function(prompt, destination, days):
-    response = client.chat.completions.create(
-        model=DEPLOYMENT,
-        messages=[
-            {"role": "system", "content": "You are a travel assistant that returns structured itineraries."},
+def itinerary_request(prompt, destination, days):
+    """Chat completion arguments (besides the model) for one itinerary."""
+    return {
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
             {"role": "user", "content": prompt}
         ],
-        functions=functions,
-        function_call={
+        "functions": functions,
+        "function_call": {
             "name": "generate_itinerary",
             "arguments": json.dumps({
                 "destination": destination,
                 "days": days
             })
         }
-    )
+    }
+
+# The same schema as a tool, so one request can return several calls
+tools = [{"type": "function", "function": functions[0]}]
+
+def pack_request(pack):
+    """Chat completion arguments asking for one generate_itinerary tool call per input in `pack`."""
+    trips = "\n".join(f"- {d['destination']} ({d['days']} days): {d['prompt']}" for d in pack)
+    return {
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": f"Call generate_itinerary once for each of these {len(pack)} trips:\n{trips}"}
+        ],
+        "tools": tools,
+        "tool_choice": "required"
+    }
+
+def estimate_tokens(messages, completions=1):
+    """Rough token count for the limiter (~4 chars per token), corrected from `usage` afterwards."""
+    chars = sum(len(m["content"]) for m in messages) + len(json.dumps(functions))
+    return chars // 4 + COMPLETION_TOKENS_ESTIMATE * completions
+
+# Retry-enabled API wrapper
+@retry(
+    retry=retry_if_exception_type((RateLimitError, APIError)),
+    wait=wait_random_exponential(min=1, max=10),
+    stop=stop_after_attempt(5),
+    reraise=True
+)
+def send_request(request, completions=1):
+    estimated = estimate_tokens(request["messages"], completions)
+    limiter.acquire(estimated)
+    try:
+        response = client.chat.completions.create(model=DEPLOYMENT, **request)
+    except RateLimitError as e:
+        limiter.record_usage(estimated, 0)  # rejected requests don't count against the token quota
+        limiter.pause(retry_after(e.response.headers))
+        raise
+    usage = response.usage
+    limiter.record_usage(estimated, usage.total_tokens if usage else estimated)
     return response
 
+def call_openai_function(prompt, destination, days):
+    return send_request(itinerary_request(prompt, destination, days))
+
+def call_openai_tools(pack):
+    return send_request(pack_request(pack), completions=len(pack))
+
 def generate_mock_itinerary(destination, days):
     return {
         "destination": destination,
@@ -78,35 +129,279 @@ def generate_mock_itinerary(destination, days):
         ]
     }
 
-def batch_process(inputs):
-    results = []
-    for i, input_data in enumerate(inputs):
+def process_input(input_data):
+    try:
+        prompt = input_data["prompt"]
+        expected_destination = input_data["destination"]
+        expected_days = input_data["days"]
+
+        print(f"🔄 Processing {expected_destination} ({expected_days} days)...")
+        response = call_openai_function(prompt, expected_destination, expected_days)
+
+        message = response.choices[0].message
+        if not message.function_call:
+            raise ValueError("no generate_itinerary call in the response")
+        args = json.loads(message.function_call.arguments)
+        actual_destination = args["destination"]
+        actual_days = args["days"]
+
+        # Validate returned arguments match expectation
+        if actual_destination != expected_destination or actual_days != expected_days:
+            print(f"⚠️ Mismatch detected! Expected '{expected_destination}' ({expected_days}), got '{actual_destination}' ({actual_days})")
+
+        return generate_mock_itinerary(actual_destination, actual_days)
+    except Exception as e:
+        print(f"❌ Error for {input_data['destination']}: {e}")
+        return {"error": str(e)}
+
+def _trip_key(destination, days):
+    return str(destination).strip().casefold(), days
+
+def match_tool_calls(pack, message):
+    """generate_itinerary arguments for each input of `pack`, in order (None where no valid call matches)."""
+    calls = {}
+    for call in message.tool_calls or []:
+        if call.function.name != "generate_itinerary":
+            continue
         try:
-            prompt = input_data["prompt"]
-            expected_destination = input_data["destination"]
-            expected_days = input_data["days"]
-
-            print(f"🔄 Processing {expected_destination} ({expected_days} days)...")
-            response = call_openai_function(prompt, expected_destination, expected_days)
-
-            message = response.choices[0].message
-            args = {"destination": expected_destination,
-                    "days": expected_days
-                    }
-            actual_destination = args["destination"]
-            actual_days = args["days"]
-
-            # Validate returned arguments match expectation
-            if actual_destination != expected_destination or actual_days != expected_days:
-                print(f"⚠️ Mismatch detected! Expected '{expected_destination}' ({expected_days}), got '{actual_destination}' ({actual_days})")
-
-            itinerary = generate_mock_itinerary(actual_destination, actual_days)
-            results.append(itinerary)
-            time.sleep(1)
-        except Exception as e:
-            print(f"❌ Error for {input_data['destination']}: {e}")
-            results.append({"error": str(e)})
-    return results
+            args = json.loads(call.function.arguments)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(args, dict):
+            calls.setdefault(_trip_key(args.get("destination"), args.get("days")), []).append(args)
+    return [
+        calls[key].pop() if calls.get(key) else None
+        for key in (_trip_key(d["destination"], d["days"]) for d in pack)
+    ]
+
+def process_pack(pack):
+    """
+    Itineraries for several inputs from a single request with parallel tool
+    calls. Inputs whose call is missing or doesn't match fall back to their
+    own request.
+    """
+    if len(pack) == 1:
+        return [process_input(pack[0])]
+    print(f"🔄 Processing {len(pack)} destinations in one request...")
+    try:
+        response = call_openai_tools(pack)
+        matched = match_tool_calls(pack, response.choices[0].message)
+    except Exception as e:
+        print(f"⚠️ Packed request failed ({e}), falling back to one request per destination")
+        matched = [None] * len(pack)
+    missing = matched.count(None)
+    if 0 < missing < len(pack):
+        print(f"⚠️ {missing} of {len(pack)} tool calls missing or mismatched, retrying them individually")
+    return [
+        generate_mock_itinerary(input_data["destination"], input_data["days"]) if args else process_input(input_data)
+        for input_data, args in zip(pack, matched)
+    ]
+
+def batch_process(inputs, max_workers=8, pack_size=1):
+    # Requests run concurrently, paced by the shared rate limiter instead of a fixed sleep;
+    # map() returns results in input order.
+    packs = [inputs[i:i + pack_size] for i in range(0, len(inputs), pack_size)]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return [result for results in pool.map(process_pack, packs) for result in results]
+
+def read_inputs(path):
+    """Lazily yields inputs from a JSONL file; items without an "id" are identified by line number."""
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if line.strip():
+                input_data = json.loads(line)
+                input_data["id"] = str(input_data.get("id", line_no))
+                yield input_data
+
+def drop_torn_line(path):
+    """Cuts off a last line left without its newline by a crash, so the next append starts a fresh line."""
+    with open(path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return
+        f.seek(end - 1)
+        if f.read(1) == b"\n":
+            return
+        while end > 0:
+            start = max(0, end - 65536)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b"\n")
+            if newline != -1:
+                f.truncate(start + newline + 1)
+                return
+            end = start
+        f.truncate(0)
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return set()
+    drop_torn_line(path)
+    with open(path, encoding="utf-8") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+def load_output_ids(path):
+    """Ids already in the output JSONL; they count as done even if the run crashed before checkpointing them."""
+    if not os.path.exists(path):
+        return set()
+    drop_torn_line(path)
+    ids = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                ids.add(str(json.loads(line)["id"]))
+            except (ValueError, KeyError, TypeError):
+                pass
+    return ids
+
+def stream_process(input_path, output_path, checkpoint_path=None, max_workers=8, pack_size=1):
+    """
+    Streaming, resumable variant of batch_process. Itineraries are appended to
+    `output_path` (JSONL, in completion order, tagged with the input id) as
+    they finish, and each finished id is then appended to the checkpoint. A
+    rerun skips ids in the checkpoint or already in the output (a crash can
+    land between the two writes); failed items are in neither, so they are
+    retried. At most 2 x max_workers packs of `pack_size` inputs are in
+    memory at a time.
+    """
+    checkpoint_path = checkpoint_path or output_path + ".checkpoint"
+    done = load_checkpoint(checkpoint_path) | load_output_ids(output_path)
+    stats = {"written": 0, "failed": 0, "skipped": 0}
+
+    def run(pack):
+        return list(zip(pack, process_pack(pack)))
+
+    def write(futures):
+        for future in futures:
+            for input_data, result in future.result():
+                if "error" in result:
+                    stats["failed"] += 1
+                    continue
+                out.write(json.dumps({"id": input_data["id"], **result}, ensure_ascii=False) + "\n")
+                out.flush()
+                checkpoint.write(input_data["id"] + "\n")
+                checkpoint.flush()
+                stats["written"] += 1
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool, \
+            open(output_path, "a", encoding="utf-8") as out, \
+            open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+        pending, pack = set(), []
+        for input_data in read_inputs(input_path):
+            if input_data["id"] in done:
+                stats["skipped"] += 1
+                continue
+            pack.append(input_data)
+            if len(pack) < pack_size:
+                continue
+            if len(pending) >= max_workers * 2:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                write(finished)
+            pending.add(pool.submit(run, pack))
+            pack = []
+        if pack:
+            pending.add(pool.submit(run, pack))
+        write(wait(pending).done)
+    return stats
+
+BATCH_MAX_REQUESTS = 100_000  # Batch API limit per input file
+
+def compile_batch_files(input_path, request_path):
+    """
+    Writes one Batch API request line per input, split into files of at most
+    BATCH_MAX_REQUESTS lines. Returns the file paths and id -> (destination, days).
+    """
+    paths, expected, out = [], {}, None
+    for input_data in read_inputs(input_path):
+        if len(expected) % BATCH_MAX_REQUESTS == 0:
+            if out:
+                out.close()
+            paths.append(f"{request_path}.part{len(paths)}.jsonl")
+            out = open(paths[-1], "w", encoding="utf-8")
+        expected[input_data["id"]] = (input_data["destination"], input_data["days"])
+        request = itinerary_request(input_data["prompt"], input_data["destination"], input_data["days"])
+        out.write(json.dumps({"custom_id": input_data["id"], "method": "POST", "url": "/chat/completions",
+                              "body": {"model": DEPLOYMENT, **request}}, ensure_ascii=False) + "\n")
+    if out:
+        out.close()
+    return paths, expected
+
+def parse_batch_result(line, expected):
+    """
+    (input id, itinerary or {"error": ...}) for one line of a batch output or
+    error file. A line that cannot be used (no function call, bad arguments,
+    unknown custom_id) becomes an error result rather than stopping the run.
+    """
+    try:
+        record = json.loads(line)
+        input_id = record["custom_id"]
+    except (json.JSONDecodeError, KeyError, TypeError) as e:
+        return None, {"error": f"Unreadable result line: {e!r}"}
+    if input_id not in expected:
+        return input_id, {"error": f"Unknown custom_id {input_id!r}"}
+    response = record.get("response") or {}
+    if record.get("error") or response.get("status_code") != 200:
+        error = record.get("error") or response.get("body", {}).get("error")
+        return input_id, {"error": str(error)}
+    try:
+        message = response["body"]["choices"][0]["message"]
+        args = json.loads(message["function_call"]["arguments"])
+    except (json.JSONDecodeError, KeyError, IndexError, TypeError) as e:
+        return input_id, {"error": f"No usable function call in the response: {e!r}"}
+    expected_destination, expected_days = expected[input_id]
+    if args.get("destination") != expected_destination or args.get("days") != expected_days:
+        return input_id, {"error": f"Mismatch: expected '{expected_destination}' ({expected_days}), got {args}"}
+    return input_id, generate_mock_itinerary(args["destination"], args["days"])
+
+def bulk_process(input_path, output_path, service, poll_interval=30):
+    """
+    Offline mode: compiles every input into Batch API request files, submits
+    them, polls until they finish and writes the itineraries (or errors) to
+    `output_path` as JSONL, tagged with their input id.
+    """
+    request_paths, expected = compile_batch_files(input_path, output_path + ".requests")
+    file_ids = [service.upload(path) for path in request_paths]
+    batch_ids = [service.create(file_id) for file_id in file_ids]
+    print(f"📤 Submitted {len(expected)} requests in {len(batch_ids)} batch(es)")
+
+    batches = {}
+    while len(batches) < len(batch_ids):
+        for batch_id in batch_ids:
+            if batch_id not in batches:
+                batch = service.retrieve(batch_id)
+                if batch["status"] in TERMINAL_STATUSES:
+                    batches[batch_id] = batch
+                else:
+                    print(f"⏳ {batch_id}: {batch['status']} ({batch['completed']}/{batch['total']})")
+        if len(batches) < len(batch_ids):
+            time.sleep(poll_interval)
+
+    stats = {"written": 0, "failed": 0, "missing": 0}
+    seen = set()
+    with open(output_path, "w", encoding="utf-8") as out:
+        for batch_id, batch in batches.items():
+            if batch["status"] != "completed":
+                print(f"❌ Batch {batch_id} ended as {batch['status']}")
+            for key in ("output_file_id", "error_file_id"):
+                if not batch.get(key):
+                    continue
+                result_path = f"{output_path}.{batch[key]}.jsonl"
+                service.download(batch[key], result_path)
+                with open(result_path, encoding="utf-8") as results:
+                    for line in results:
+                        if not line.strip():
+                            continue
+                        input_id, result = parse_batch_result(line, expected)
+                        if input_id in expected:
+                            seen.add(input_id)
+                        stats["failed" if "error" in result else "written"] += 1
+                        out.write(json.dumps({"id": input_id, **result}, ensure_ascii=False) + "\n")
+                os.remove(result_path)
+                service.delete(batch[key])
+    stats["missing"] = len(expected) - len(seen)
+    for path, file_id in zip(request_paths, file_ids):
+        os.remove(path)
+        service.delete(file_id)
+    return stats
 
 # Sample input list
 sample_inputs = [
@@ -117,14 +412,42 @@ sample_inputs = [
 
 # Run the batch
 if __name__ == "__main__":
-    print("🚀 Starting batch request...")
-    outputs = batch_process(sample_inputs)
-
-    for i, result in enumerate(outputs):
-        expected = sample_inputs[i]
-        print(f"\n📍 Itinerary for {expected['destination']}:")
-        if "error" in result:
-            print(f"❌ {result['error']}")
-        else:
-            print(json.dumps(result, indent=2))
-        print("-" * 50)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate travel itineraries in batch.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once.")
+    parser.add_argument("--input", help="JSONL file of inputs to stream (default: the built-in samples).")
+    parser.add_argument("--output", default="itineraries.jsonl", help="JSONL file itineraries are appended to.")
+    parser.add_argument("--checkpoint", help="File of finished input ids (default: <output>.checkpoint).")
+    parser.add_argument("--pack-size", type=int, default=1,
+                        help="Destinations per request (parallel tool calls); 1 sends one request each.")
+    parser.add_argument("--bulk", action="store_true", help="Send --input through the Batch API instead of chat calls.")
+    parser.add_argument("--local-batch", action="store_true", help="Use the offline batch stand-in with --bulk.")
+    parser.add_argument("--poll-interval", type=float, default=30, help="Seconds between batch status checks.")
+    args = parser.parse_args()
+    if args.bulk and not args.input:
+        parser.error("--bulk needs --input")
+    if args.local_batch and not args.bulk:
+        parser.error("--local-batch needs --bulk")
+
+    if args.bulk:
+        service = LocalBatchService() if args.local_batch else AzureBatchService(client)
+        print(f"🚀 Bulk {args.input} -> {args.output}...")
+        stats = bulk_process(args.input, args.output, service, poll_interval=args.poll_interval)
+        print(f"✅ {stats['written']} written, {stats['failed']} failed, {stats['missing']} missing")
+    elif args.input:
+        print(f"🚀 Streaming {args.input} -> {args.output}...")
+        stats = stream_process(args.input, args.output, args.checkpoint, max_workers=args.concurrency,
+                               pack_size=args.pack_size)
+        print(f"✅ {stats['written']} written, {stats['failed']} failed (retried on the next run), "
+              f"{stats['skipped']} already done")
+    else:
+        print("🚀 Starting batch request...")
+        outputs = batch_process(sample_inputs, max_workers=args.concurrency, pack_size=args.pack_size)
+
+        for i, result in enumerate(outputs):
+            expected = sample_inputs[i]
+            print(f"\n📍 Itinerary for {expected['destination']}:")
+            if "error" in result:
+                print(f"❌ {result['error']}")
+            else:
+                print(json.dumps(result, indent=2))
+            print("-" * 50)
\ No newline at end of file
@@ -0,0 +1,120 @@
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from batch_service import itinerary_args
+
+
+def packed_trips(request):
+    """(destination, days) for each "- Destination (N days): ..." line of a packed request."""
+    prompt = request.get("messages", [{}])[-1].get("content", "")
+    return [{"destination": m.group(1), "days": int(m.group(2))}
+            for m in re.finditer(r"^- (.+) \((\d+) days?\)", prompt, re.MULTILINE)]
+
+
+class MockChatHandler(BaseHTTPRequestHandler):
+    """
+    Answers POST .../chat/completions with a generate_itinerary function call
+    after a fixed delay, or with one tool call per trip when the request
+    uses `tools` (a fraction `drop_rate` of those calls is left out, to
+    exercise the fallback). Returns 429 with a Retry-After header when the
+    server's requests-per-minute quota is exceeded, and at random with
+    probability `error_rate`.
+    """
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real endpoint
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if not self.path.split("?")[0].endswith("/chat/completions"):
+            self._send(404, {"error": {"message": "not found"}})
+            return
+        request = json.loads(body or b"{}")
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+            now = time.monotonic()
+            while server.window and server.window[0] < now - 60:
+                server.window.popleft()
+            over_quota = server.rpm is not None and len(server.window) >= server.rpm
+            if over_quota or random.random() < server.error_rate:
+                server.throttled_count += 1
+                retry = 60 - (now - server.window[0]) if over_quota else server.retry_after
+                self._send(429, {"error": {"code": "429", "message": "Rate limit is exceeded."}},
+                           {"retry-after-ms": str(int(retry * 1000)), "retry-after": str(max(1, round(retry)))})
+                return
+            server.window.append(now)
+        time.sleep(server.latency)
+        prompt_tokens = len(body) // 4
+        with server.lock:
+            server.prompt_tokens += prompt_tokens
+        if request.get("tools"):
+            calls = [
+                {"id": f"call_{i}", "type": "function",
+                 "function": {"name": "generate_itinerary", "arguments": json.dumps(args)}}
+                for i, args in enumerate(packed_trips(request)) if random.random() >= server.drop_rate
+            ]
+            message, finish_reason = {"role": "assistant", "content": None, "tool_calls": calls}, "tool_calls"
+        else:
+            message = {
+                "role": "assistant",
+                "content": None,
+                "function_call": {"name": "generate_itinerary", "arguments": json.dumps(itinerary_args(request))},
+            }
+            finish_reason = "function_call"
+        self._send(200, {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 20, "total_tokens": prompt_tokens + 20},
+        })
+
+    def _send(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output readable
+
+
+class MockHTTPServer(ThreadingHTTPServer):
+    """Accepts the whole worker pool connecting at once (the default listen backlog is 5)."""
+    request_queue_size = 256
+    daemon_threads = True
+
+
+def start_mock_server(latency=0.2, rpm=None, error_rate=0.0, retry_after=1.0, drop_rate=0.0, port=0):
+    """Starts the mock server in a background thread and returns (server, endpoint_url)."""
+    server = MockHTTPServer(("127.0.0.1", port), MockChatHandler)
+    server.latency = latency
+    server.rpm = rpm
+    server.error_rate = error_rate
+    server.retry_after = retry_after
+    server.drop_rate = drop_rate
+    server.lock = threading.Lock()
+    server.window = deque()  # accepted request times in the last minute
+    server.request_count = 0
+    server.throttled_count = 0
+    server.prompt_tokens = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    server, url = start_mock_server(rpm=120, error_rate=0.05, port=8766)
+    print(f"Mock Azure OpenAI endpoint running at {url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
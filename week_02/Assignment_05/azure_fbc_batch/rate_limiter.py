@@ -0,0 +1,83 @@
+# Also copied, on purpose, to week_02/Assignment_06/rate_limiter.py so that each assignment folder
+# runs on its own; apply any change to both copies.
+import threading
+import time
+
+
+class TokenBucket:
+    """Holds up to `capacity` units and refills continuously at `capacity` per `period` seconds."""
+
+    def __init__(self, capacity, period=60.0):
+        self.capacity = float(capacity)
+        self.rate = capacity / period
+        self.level = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until `amount` units are available (0 if they are now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)  # a request bigger than the bucket would otherwise never fit
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount):
+        # May go negative when a correction is larger than what is left; that debt is repaid by the refill.
+        self.level -= amount
+
+
+class RateLimiter:
+    """
+    Client-side limiter for both Azure OpenAI quotas: requests per minute and
+    tokens per minute. Callers block in acquire() until their request fits in
+    both buckets. A 429's Retry-After is fed back through pause(), which holds
+    every caller, since the quota is shared by the whole deployment.
+    """
+
+    def __init__(self, rpm, tpm):
+        # Azure enforces quotas over short windows, so only a 10-second share may be used in a burst.
+        self.requests = TokenBucket(rpm / 6, period=10.0)
+        self.tokens = TokenBucket(tpm / 6, period=10.0)
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+        self.waited = 0.0  # total seconds callers spent blocked
+        self.pauses = 0
+
+    def acquire(self, tokens):
+        """Blocks until one request and `tokens` tokens are available, then takes them."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                delay = max(self.blocked_until - now,
+                            self.requests.wait_time(1, now),
+                            self.tokens.wait_time(tokens, now))
+                if delay <= 0:
+                    self.requests.take(1)
+                    self.tokens.take(tokens)
+                    return
+                self.waited += delay
+            time.sleep(delay)
+
+    def record_usage(self, estimated, actual):
+        """Corrects the token bucket once the real usage of a request is known."""
+        with self.lock:
+            self.tokens.take(actual - estimated)
+
+    def pause(self, seconds):
+        """The server asked us to back off: nobody sends for `seconds`."""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.pauses += 1
+
+
+def retry_after(headers, default=1.0):
+    """Seconds to wait according to a 429 response's headers (retry-after-ms, then retry-after)."""
+    headers = headers or {}
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        try:
+            return float(headers.get(name)) * scale
+        except (TypeError, ValueError):
+            continue
+    return default
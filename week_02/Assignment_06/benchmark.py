@@ -0,0 +1,283 @@
+import argparse
+import contextlib
+import csv
+import importlib
+import io
+import itertools
+import os
+import random
+import tempfile
+import time
+
+from label_cache import LabelCache, normalize_log
+from mock_llm_server import start_mock_server
+
+SAMPLE_LOGS = [
+    "Heavy traffic near depot",
+    "Customer wasn't available at drop-off",
+    "Vehicle broke down mid-delivery",
+    "Thunderstorm delayed departure",
+    "Barcode unreadable, needed manual entry",
+    "Driver missed turn and rerouted",
+    "Arrived on schedule, no delay",
+    "Wrong address on package",
+    "System reboot caused docking issue",
+    "Accident near warehouse caused delay",
+    "Late start due to staff confusion",
+    "Windstorm disrupted outdoor loading",
+    "Scanner error during inventory",
+    "Package mixed with wrong batch",
+    "Driver forgot to confirm arrival",
+    "Navigation system crashed",
+    "Customer changed delivery time last minute",
+    "Engine warning light triggered mid-trip",
+    "Rain made roadside unsafe",
+    "Security check took longer than expected"
+]
+FILLER = ["near", "route", "12", "hub", "A7", "north", "gate", "after", "loading", "bay", "truck", "shift"]
+
+
+def load_classifier(endpoint, workdir):
+    """
+    Imports delay_classifier against the mock endpoint. Its client, rate
+    limiter, label cache and local model are created at import, so the
+    environment is set first: quota high enough never to throttle, and the
+    default cache and model under `workdir`.
+    """
+    os.environ.update({
+        "AZURE_OPENAI_ENDPOINT": endpoint,
+        "AZURE_OPENAI_API_KEY": "mock",
+        "AZURE_DEPLOYMENT_NAME": "mock",
+        "AZURE_OPENAI_RPM": "1000000",
+        "AZURE_OPENAI_TPM": "1000000000",
+        "LABEL_CACHE": os.path.join(workdir, "label_cache.sqlite"),
+        "LOCAL_MODEL": os.path.join(workdir, "local_model.json"),
+    })
+    return importlib.import_module("delay_classifier")
+
+
+def legacy_classifier(keywords):
+    """The previous heuristic: one substring scan per keyword, first match in dict order wins."""
+    def legacy_initial_classify(text):
+        for k, v in keywords.items():
+            if k in text.lower():
+                return v
+        return "Other"
+    return legacy_initial_classify
+
+
+def synthetic_logs(count, distinct=100_000, max_filler=6, seed=0):
+    """`count` log lines cycling through `distinct` variants of the sample logs with up to `max_filler` extra words."""
+    rng = random.Random(seed)
+    pool = [
+        f"{rng.choice(SAMPLE_LOGS)} {' '.join(rng.choices(FILLER, k=rng.randint(0, max_filler)))}".strip()
+        for _ in range(distinct)
+    ]
+    return itertools.islice(itertools.cycle(pool), count)
+
+
+def bench_initial_classify(lines, max_filler, repeats=5):
+    """
+    Times the legacy scan and initial_classify over the same in-memory lines,
+    alternating between them and keeping each one's best of `repeats` runs,
+    so that machine noise and warm-up don't decide the comparison.
+    """
+    from delay_classifier import KEYWORDS, initial_classify, heuristic_confidence
+    legacy_initial_classify = legacy_classifier(KEYWORDS)
+    pool = list(synthetic_logs(min(lines, 100_000), max_filler=max_filler))
+    passes = max(lines // len(pool), 1)
+    lines = passes * len(pool)
+    print(f"initial_classify over {lines:,} synthetic log lines (up to {max_filler} filler words each, "
+          f"best of {repeats})")
+    candidates = (
+        ("legacy substring scan", legacy_initial_classify),
+        ("initial_classify", initial_classify),
+        ("+ heuristic_confidence", lambda text: heuristic_confidence(text, initial_classify(text))),
+    )
+    best = {name: float("inf") for name, _ in candidates}
+    for _ in range(repeats):
+        for name, fn in candidates:
+            start = time.perf_counter()
+            for _ in range(passes):
+                for line in pool:
+                    fn(line)
+            best[name] = min(best[name], time.perf_counter() - start)
+    for name, elapsed in best.items():
+        print(f"  {name:<24} {elapsed:7.2f}s {lines / elapsed:12,.0f} lines/s {elapsed / lines * 1e6:6.2f} us/line")
+
+    changed = sum(legacy_initial_classify(line) != initial_classify(line) for line in pool)
+    print(f"  labels that differ from the legacy heuristic: {changed / len(pool):.2%}")
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(p / 100 * (len(ordered) - 1)))]
+
+
+class Run:
+    """Times one pipeline run: wall clock, each LLM request (as seen by the client) and the mock's counters."""
+
+    def __init__(self, dc, server):
+        self.dc = dc
+        self.server = server
+        self.latencies = []
+
+    def __enter__(self):
+        create_completion = self.dc.create_completion
+
+        def timed(**kwargs):
+            start = time.perf_counter()
+            try:
+                return create_completion(**kwargs)
+            finally:
+                self.latencies.append(time.perf_counter() - start)
+
+        self._original = create_completion
+        self.dc.create_completion = timed
+        self.requests = self.server.request_count
+        self.throttled = self.server.throttled_count
+        self.errors = self.server.error_count
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.started
+        self.dc.create_completion = self._original
+        self.requests = self.server.request_count - self.requests
+        self.throttled = self.server.throttled_count - self.throttled
+        self.errors = self.server.error_count - self.errors
+
+
+MODES = ["heuristic", "single-ungated", "single", "batched", "cache", "stream-1", "stream-8", "stream-8-single",
+         "local-model"]
+
+
+def bench_pipeline(dc, server, logs, workdir, modes, batch_size):
+    """
+    Runs each mode over the same CSV and prints one table row per mode.
+    Latency percentiles are per LLM request, including time queued in the
+    rate limiter; for "heuristic" they are per row.
+    """
+    with open(logs, newline="", encoding="utf-8") as f:
+        texts = [row["log_entry"] for row in csv.DictReader(f)]
+    cache_path = os.path.join(workdir, "bench_cache.sqlite")
+    results = []
+
+    def pipeline(name, run_fn):
+        stats = dc.new_stats()
+        with Run(dc, server) as run, contextlib.redirect_stdout(io.StringIO()):
+            run_fn(stats)
+        rows = max(stats["rows"], 1)
+        results.append((name, stats["rows"], run.elapsed, run.latencies, stats["llm_calls"] * 1000 / rows,
+                        run.requests * 1000 / rows, run.throttled, run.errors))
+
+    def fresh_cache():
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+        return LabelCache(cache_path, model_key="bench")
+
+    for mode in modes:
+        print(f"  running {mode}...")
+        if mode == "heuristic":
+            latencies = []
+            start = time.perf_counter()
+            for text in texts:
+                t = time.perf_counter()
+                dc.heuristic_confidence(text, dc.initial_classify(text))
+                latencies.append(time.perf_counter() - t)
+            results.append((mode, len(texts), time.perf_counter() - start, latencies, 0.0, 0.0, 0, 0))
+        elif mode == "single-ungated":
+            # every row to the LLM (threshold above any confidence), as before gating; dedupe still applies
+            pipeline(mode, lambda stats: dc.classify_logs(logs, cache=None, threshold=1.01, stats=stats,
+                                                          batch_size=1))
+        elif mode == "single":
+            pipeline(mode, lambda stats: dc.classify_logs(logs, cache=None, stats=stats, batch_size=1))
+        elif mode == "batched":
+            pipeline(mode, lambda stats: dc.classify_logs(logs, cache=None, stats=stats, batch_size=batch_size))
+        elif mode == "cache":
+            # a rerun over the same data with the cache filled by a first, untimed run
+            cache = fresh_cache()
+            with contextlib.redirect_stdout(io.StringIO()):
+                dc.classify_logs(logs, cache=cache, batch_size=batch_size)
+            pipeline(mode, lambda stats: dc.classify_logs(logs, cache=cache, stats=stats, batch_size=batch_size))
+            cache.close()
+        elif mode.startswith("stream-"):
+            workers = int(mode.split("-")[1])
+            size = 1 if mode.endswith("-single") else batch_size
+            output = os.path.join(workdir, f"{mode}.csv")
+            for path in (output, output + ".checkpoint"):
+                if os.path.exists(path):
+                    os.remove(path)
+            pipeline(mode, lambda stats: dc.stream_classify(logs, output, cache=None, batch_size=size,
+                                                            max_workers=workers, chunk_rows=dc.CHUNK_ROWS,
+                                                            stats=stats))
+        elif mode == "local-model":
+            # trained on the labels of a batched run over a CSV drawn with another seed, then answering
+            # this CSV with an empty cache
+            train_logs = os.path.join(workdir, "train_logs.csv")
+            dc.generate_dummy_logs(train_logs, rows=len(texts), seed=1)
+            cache = fresh_cache()
+            with contextlib.redirect_stdout(io.StringIO()):
+                dc.classify_logs(train_logs, cache=cache, batch_size=batch_size)
+                model = dc.retrain_local_model(cache, path=os.path.join(workdir, "bench_model.json"))
+            trained = {text for text, _ in cache.items()}
+            cache.close()
+            if model is None:
+                print("  ⚠️ Not enough LLM labels to train the local model; skipped")
+                continue
+            seen = sum(normalize_log(text) in trained for text in texts) / max(len(texts), 1)
+            print(f"  ℹ️ local-model: trained on seed 1, scored on seed 0; {seen:.0%} of the scored rows "
+                  f"match a training text after normalization")
+            dc.local_model = model
+            try:
+                pipeline(mode, lambda stats: dc.classify_logs(logs, cache=None, stats=stats,
+                                                              batch_size=batch_size))
+            finally:
+                dc.local_model = None
+
+    print(f"\n{'mode':<16} {'rows':>9} {'seconds':>8} {'rows/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'calls/1k':>9} {'http/1k':>8} {'429s':>5} {'500s':>5}")
+    for name, rows, elapsed, latencies, calls, http, throttled, errors in results:
+        p50, p95, p99 = (f"{percentile(latencies, p) * 1000:.3f}" if latencies else "-" for p in (50, 95, 99))
+        print(f"{name:<16} {rows:>9,} {elapsed:>8.2f} {rows / elapsed:>10,.0f} {p50:>8} {p95:>8} {p99:>8} "
+              f"{calls:>9.2f} {http:>8.2f} {throttled:>5} {errors:>5}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput benchmarks for delay_classifier against a mock LLM.")
+    parser.add_argument("--rows", type=int, default=20_000, help="Dummy log rows to generate.")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES, help="Pipeline modes to run.")
+    parser.add_argument("--batch-size", type=int, default=40, help="Entries per request in batched modes.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock seconds per request.")
+    parser.add_argument("--item-latency", type=float, default=0.002, help="Mock extra seconds per batched entry.")
+    parser.add_argument("--rpm", type=int, help="Mock requests-per-minute quota (429 past it).")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of requests answered with 429.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 500.")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="Share of JSON replies cut off.")
+    parser.add_argument("--heuristic-lines", type=int, default=0,
+                        help="Also compare initial_classify with the legacy scan over this many synthetic lines.")
+    parser.add_argument("--max-filler", type=int, nargs="+", default=[6, 40],
+                        help="Synthetic corpora for that comparison: max filler words per line.")
+    args = parser.parse_args()
+
+    server, endpoint = start_mock_server(latency=args.latency, item_latency=args.item_latency, rpm=args.rpm,
+                                         throttle_rate=args.throttle_rate, error_rate=args.error_rate,
+                                         truncate_rate=args.truncate_rate)
+    with tempfile.TemporaryDirectory() as workdir:
+        dc = load_classifier(endpoint, workdir)
+        if args.heuristic_lines:
+            for max_filler in args.max_filler:
+                bench_initial_classify(args.heuristic_lines, max_filler)
+        logs = os.path.join(workdir, "logs.csv")
+        dc.generate_dummy_logs(logs, rows=args.rows)
+        print(f"Pipeline modes over {args.rows:,} dummy log rows; mock latency {args.latency * 1000:.0f} ms "
+              f"+ {args.item_latency * 1000:.0f} ms per batched entry")
+        bench_pipeline(dc, server, logs, workdir, args.modes, args.batch_size)
+        dc.label_cache.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
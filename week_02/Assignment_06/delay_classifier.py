@@ -2,19 +2,35 @@ import os
 import csv
 import json
 import random
+import time
+import argparse
+import threading
+import itertools
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from dotenv import load_dotenv
 from openai import AzureOpenAI
 from tenacity import retry, wait_random_exponential, stop_after_attempt, retry_if_exception_type
 from openai import RateLimitError, APIError
+from label_cache import LabelCache, normalize_log
+from rate_limiter import RateLimiter, retry_after
+from result_writers import load_checkpoint, save_checkpoint, open_writer
+from local_model import HashedNgramClassifier, split_holdout, evaluate
 
 # Step 1: Load Azure credentials from .env file
 load_dotenv()
+# (the client's own retries are off so that 429s reach the rate limiter and tenacity)
 client = AzureOpenAI(
     api_key=os.getenv("AZURE_OPENAI_API_KEY"),
     azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-    api_version="2024-07-01-preview"
+    api_version="2024-07-01-preview",
+    max_retries=0
 )
 deployment_name = os.getenv("AZURE_DEPLOYMENT_NAME")
+# Deployment quota, shared by all worker threads
+limiter = RateLimiter(
+    rpm=int(os.getenv("AZURE_OPENAI_RPM", 60)),
+    tpm=int(os.getenv("AZURE_OPENAI_TPM", 10000))
+)
 
 # Step 2: Define delay categories
 DELAY_CATEGORIES = [
@@ -29,7 +45,25 @@ DELAY_CATEGORIES = [
 ]
 
 # Step 3: Generate dummy log data into CSV
-def generate_dummy_logs(filename="logs.csv"):
+# Extra context for scaled-up dummy data; some clauses add a second category's keyword
+CONTEXTS = [
+    "at north gate",
+    "near hub B",
+    "on ring road",
+    "at loading bay",
+    "during morning shift",
+    "after heavy rain",
+    "while scanner was offline",
+    "during customer handover",
+    "with a new driver",
+    "in slow traffic"
+]
+
+def generate_dummy_logs(filename="logs.csv", rows=None, seed=0):
+    """
+    Writes the sample logs once, or `rows` rows drawn at random from them
+    with an optional context clause and stop number, for benchmarks.
+    """
     samples = [
         "Heavy traffic near depot",
         "Customer wasn't available at drop-off",
@@ -55,38 +89,96 @@ def generate_dummy_logs(filename="logs.csv"):
     with open(filename, "w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
         writer.writerow(["log_id", "log_entry"])
-        for i, entry in enumerate(samples, start=1):
+        if rows is None:
+            for i, entry in enumerate(samples, start=1):
+                writer.writerow([i, entry])
+            return
+        rng = random.Random(seed)
+        for i in range(1, rows + 1):
+            entry = rng.choice(samples)
+            if rng.random() < 0.5:
+                entry += " " + rng.choice(CONTEXTS)
+            if rng.random() < 0.3:
+                entry += f", stop {rng.randint(1, 400)}"
             writer.writerow([i, entry])
 
 # Step 4: Heuristic Classifier
+KEYWORDS = {
+    "traffic": "Traffic",
+    "accident": "Traffic",
+    "customer": "Customer Issue",
+    "unavailable": "Customer Issue",
+    "engine": "Vehicle Issue",
+    "vehicle": "Vehicle Issue",
+    "rain": "Weather",
+    "wind": "Weather",
+    "storm": "Weather",
+    "label": "Sorting/Labeling Error",
+    "barcode": "Sorting/Labeling Error",
+    "manual": "Sorting/Labeling Error",
+    "wrong": "Human Error",
+    "missed": "Human Error",
+    "forgot": "Human Error",
+    "system": "Technical System Failure",
+    "glitch": "Technical System Failure",
+    "crashed": "Technical System Failure",
+    "scanner": "Technical System Failure"
+}
+
+# Keywords of every other category, per category, for the confidence check
+OTHER_KEYWORDS = {
+    category: tuple(k for k, c in KEYWORDS.items() if c != category) for category in set(KEYWORDS.values())
+}
+
 def initial_classify(text):
-    keywords = {
-        "traffic": "Traffic",
-        "accident": "Traffic",
-        "customer": "Customer Issue",
-        "unavailable": "Customer Issue",
-        "engine": "Vehicle Issue",
-        "vehicle": "Vehicle Issue",
-        "rain": "Weather",
-        "wind": "Weather",
-        "storm": "Weather",
-        "label": "Sorting/Labeling Error",
-        "barcode": "Sorting/Labeling Error",
-        "manual": "Sorting/Labeling Error",
-        "wrong": "Human Error",
-        "missed": "Human Error",
-        "forgot": "Human Error",
-        "system": "Technical System Failure",
-        "glitch": "Technical System Failure",
-        "crashed": "Technical System Failure",
-        "scanner": "Technical System Failure"
-    }
-    for k, v in keywords.items():
-        if k in text.lower():
+    """First keyword match in KEYWORDS order wins; the text is lowercased once, not once per keyword."""
+    lowered = text.lower()
+    for k, v in KEYWORDS.items():
+        if k in lowered:
             return v
     return "Other"
 
+def heuristic_confidence(text, label):
+    """
+    Share of the keywords found in `text` that point at `label`: 1.0 when no
+    other category's keyword appears, 0.0 for "Other". Kept apart from
+    initial_classify because it has to check every keyword, while the label
+    only needs the first match.
+    """
+    if label == "Other":
+        return 0.0
+    lowered = text.lower()
+    if not any(map(lowered.__contains__, OTHER_KEYWORDS[label])):
+        return 1.0
+    hits = [k for k in KEYWORDS if k in lowered]
+    return sum(KEYWORDS[k] == label for k in hits) / len(hits)
+
 # Step 5: LLM Refinement using Azure
+# Token usage of all refinement calls, for reporting prompt tokens per row
+usage_totals = {"prompt_tokens": 0, "completion_tokens": 0}
+usage_lock = threading.Lock()
+
+def estimate_tokens(text):
+    return len(text) // 4 + 1
+
+def create_completion(**kwargs):
+    """chat.completions.create paced by the shared limiter; a 429's Retry-After pauses every caller."""
+    estimated = sum(estimate_tokens(m["content"]) for m in kwargs["messages"]) + kwargs.get("max_tokens", 20)
+    limiter.acquire(estimated)
+    try:
+        response = client.chat.completions.create(model=deployment_name, **kwargs)
+    except RateLimitError as e:
+        limiter.record_usage(estimated, 0)
+        limiter.pause(retry_after(e.response.headers))
+        raise
+    usage = response.usage
+    limiter.record_usage(estimated, usage.total_tokens if usage else estimated)
+    if usage:
+        with usage_lock:
+            usage_totals["prompt_tokens"] += usage.prompt_tokens
+            usage_totals["completion_tokens"] += usage.completion_tokens
+    return response
+
 @retry(
     retry=retry_if_exception_type((RateLimitError, APIError)),
     wait=wait_random_exponential(min=1, max=5),
@@ -111,41 +203,445 @@ Log Entry:
 
 Return only the most appropriate category from the list above.
 """
-    response = client.chat.completions.create(
-        model=deployment_name,
+    response = create_completion(
         messages=[{"role": "user", "content": prompt}],
         temperature=0
     )
     return response.choices[0].message.content.strip()
 
+# Step 5b: Batched LLM Refinement (many log entries per request, JSON output)
+BATCH_SIZE = int(os.getenv("BATCH_SIZE", 40))
+BATCH_PROMPT_TOKENS = int(os.getenv("BATCH_PROMPT_TOKENS", 3000))
+TOKENS_PER_RESULT = 20  # budget for one {"id": .., "category": ..} item in the reply
+BATCH_PROMPT = f"""You are a logistics assistant. Classify each maintenance log entry into exactly one of these delay categories:
+{", ".join(DELAY_CATEGORIES)}
+
+Each line of the user message is a JSON object with an "id", the "log" text and a heuristic "guess".
+Reply with a JSON object {{"results": [{{"id": <id>, "category": "<category>"}}, ...]}} with one result per entry."""
+
+@retry(
+    retry=retry_if_exception_type((RateLimitError, APIError)),
+    wait=wait_random_exponential(min=1, max=5),
+    stop=stop_after_attempt(5),
+    reraise=True
+)
+def refine_batch(entries):
+    """
+    Classifies several (text, initial_label) entries in one request. Returns
+    one category per entry, None where the reply has no valid category for
+    it. Raises ValueError when the reply is cut off or is not the expected JSON.
+    """
+    lines = "\n".join(
+        json.dumps({"id": i, "log": text, "guess": initial}, ensure_ascii=False)
+        for i, (text, initial) in enumerate(entries)
+    )
+    response = create_completion(
+        messages=[
+            {"role": "system", "content": BATCH_PROMPT},
+            {"role": "user", "content": lines}
+        ],
+        temperature=0,
+        response_format={"type": "json_object"},
+        max_tokens=TOKENS_PER_RESULT * len(entries) + 50
+    )
+    choice = response.choices[0]
+    if choice.finish_reason == "length":
+        raise ValueError("reply was cut off")
+    try:
+        results = json.loads(choice.message.content)["results"]
+        labels = [None] * len(entries)
+        for item in results:
+            index, category = item.get("id"), item.get("category")
+            if isinstance(index, int) and 0 <= index < len(entries) and category in DELAY_CATEGORIES:
+                labels[index] = category
+    except (json.JSONDecodeError, KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"invalid JSON reply: {e}") from None
+    return labels
+
+class BatchRefiner:
+    """
+    Queues rows that need the LLM and classifies them in batches of up to
+    `size` entries and `max_prompt_tokens` estimated prompt tokens. The size
+    adapts: a reply that is cut off or not valid JSON halves it (and the
+    batch is retried in halves), and each good batch grows it back by one.
+    Entries left without a valid category are re-sent individually.
+    classify() may run on several threads at once; they share the size.
+    """
+
+    def __init__(self, max_size=BATCH_SIZE, max_prompt_tokens=BATCH_PROMPT_TOKENS):
+        self.max_size = max_size
+        self.size = max_size
+        self.max_prompt_tokens = max_prompt_tokens
+        self.pending = []  # (key, text, initial_label)
+        self.pending_tokens = 0
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def add(self, key, text, initial):
+        """Queues one entry; returns {key: label} for the batch this completed, if any."""
+        self.pending.append((key, text, initial))
+        self.pending_tokens += estimate_tokens(text) + 15  # plus the JSON wrapping
+        if self.is_full(len(self.pending), self.pending_tokens):
+            return self.flush()
+        return {}
+
+    def is_full(self, count, tokens):
+        return count >= self.size or tokens >= self.max_prompt_tokens
+
+    def batches(self, entries):
+        """
+        Cuts (key, text, initial_label) entries into batches by the same
+        limits as add(). Lazy: each batch is cut with the size at that moment.
+        """
+        batch, tokens = [], 0
+        for entry in entries:
+            batch.append(entry)
+            tokens += estimate_tokens(entry[1]) + 15
+            if self.is_full(len(batch), tokens):
+                yield batch
+                batch, tokens = [], 0
+        if batch:
+            yield batch
+
+    def flush(self):
+        entries, self.pending, self.pending_tokens = self.pending, [], 0
+        return self.classify(entries)
+
+    def classify(self, entries):
+        """Labels for a list of (key, text, initial_label) entries, as {key: label}."""
+        labels = {}
+        if entries:
+            self._classify(entries, labels)
+        return labels
+
+    def _count_request(self):
+        with self.lock:
+            self.requests += 1
+
+    def _classify(self, entries, labels):
+        if len(entries) == 1:
+            key, text, initial = entries[0]
+            self._count_request()
+            labels[key] = refine_classification(text, initial)
+            return
+        self._count_request()
+        try:
+            results = refine_batch([(text, initial) for _, text, initial in entries])
+        except ValueError as e:
+            half = len(entries) // 2
+            with self.lock:
+                self.size = max(1, half)
+            print(f"⚠️ Batch of {len(entries)} failed ({e}), retrying in halves")
+            self._classify(entries[:half], labels)
+            self._classify(entries[half:], labels)
+            return
+        with self.lock:
+            self.size = min(self.max_size, self.size + 1)
+        for (key, text, initial), label in zip(entries, results):
+            if label is None:
+                self._count_request()
+                label = refine_classification(text, initial)
+            labels[key] = label
+
 # Step 6: Classification Pipeline
-def classify_logs(filename="logs.csv"):
+# Rows the heuristic is sure about skip the LLM; everything else is deduplicated and cached.
+CONFIDENCE_THRESHOLD = float(os.getenv("CONFIDENCE_THRESHOLD", 0.75))
+PROMPT_VERSION = "1"  # bump when the refinement prompt changes, to start a fresh label cache
+LABEL_CACHE_PATH = os.getenv("LABEL_CACHE", "label_cache.sqlite")
+label_cache = LabelCache(LABEL_CACHE_PATH, model_key=f"{deployment_name}:{PROMPT_VERSION}") if LABEL_CACHE_PATH else None
+
+# Local model trained from the LLM labels in the cache (see --retrain); answers when it is sure enough.
+LOCAL_MODEL_PATH = os.getenv("LOCAL_MODEL", "local_model.json")
+MODEL_CONFIDENCE = float(os.getenv("MODEL_CONFIDENCE", 0.9))
+MIN_TRAINING_PAIRS = 50
+local_model = HashedNgramClassifier.load(LOCAL_MODEL_PATH) if os.path.exists(LOCAL_MODEL_PATH) else None
+
+def needs_llm(label, confidence, threshold=CONFIDENCE_THRESHOLD):
+    """No keyword at all, or keywords pointing at several categories."""
+    return label == "Other" or confidence < threshold
+
+def new_stats():
+    return {"rows": 0, "heuristic": 0, "duplicate": 0, "cache": 0, "model": 0, "llm": 0, "llm_calls": 0,
+            "prompt_tokens": usage_totals["prompt_tokens"], "started": time.perf_counter()}
+
+def report_stats(stats):
+    elapsed = time.perf_counter() - stats["started"]
+    rows = max(stats["rows"], 1)
+    prompt_tokens = usage_totals["prompt_tokens"] - stats["prompt_tokens"]
+    print(f"📈 {stats['rows']} rows in {elapsed:.2f}s ({stats['rows'] / elapsed:,.0f} rows/s): "
+          f"{stats['heuristic']} by heuristic, {stats['duplicate']} duplicates, {stats['cache']} from cache, "
+          f"{stats['model']} by local model, "
+          f"{stats['llm']} by LLM in {stats['llm_calls']} calls ({stats['llm_calls'] * 1000 / rows:.2f} per 1k rows, "
+          f"{prompt_tokens / max(stats['llm'], 1):.0f} prompt tokens per LLM row)")
+
+def lookup_label(log_entry, initial, confidence, seen, cache=None, threshold=CONFIDENCE_THRESHOLD):
+    """
+    Returns (label, source, key) without calling the LLM: `label` is None
+    when the row needs a refinement call. `seen` maps normalized texts
+    already decided in this run to their label; `source` is "heuristic",
+    "duplicate", "cache", "model" or "llm".
+    """
+    if not needs_llm(initial, confidence, threshold):
+        return initial, "heuristic", None
+    key = normalize_log(log_entry)
+    if key in seen:
+        return seen[key], "duplicate", key
+    label = cache.get(key) if cache is not None else None
+    if label is not None:
+        seen[key] = label
+        return label, "cache", key
+    if local_model is not None:
+        label, probability = local_model.predict(key)
+        if probability >= MODEL_CONFIDENCE:
+            seen[key] = label
+            return label, "model", key
+    return None, "llm", key
+
+def remember_label(key, label, seen, cache=None):
+    seen[key] = label
+    if cache is not None and label in DELAY_CATEGORIES:
+        cache.put(key, label)
+
+def decide_label(log_entry, initial, confidence, seen, stats, cache=None, threshold=CONFIDENCE_THRESHOLD):
+    """Returns (final_label, source) for one row, calling the LLM right away if needed."""
+    final, source, key = lookup_label(log_entry, initial, confidence, seen, cache, threshold)
+    if final is None:
+        final = refine_classification(log_entry, initial)
+        stats["llm_calls"] += 1
+        remember_label(key, final, seen, cache)
+    stats["rows"] += 1
+    stats[source] += 1
+    return final, source
+
+def classify_logs(filename="logs.csv", cache=label_cache, threshold=CONFIDENCE_THRESHOLD, stats=None,
+                  batch_size=BATCH_SIZE):
+    """
+    Classifies every row of the CSV. With batch_size > 1, rows that need the
+    LLM are queued in a BatchRefiner and their labels filled in once their
+    batch has been answered.
+    """
+    stats = stats if stats is not None else new_stats()
+    seen = {}
     results = []
+    refiner = BatchRefiner(batch_size) if batch_size > 1 else None
+    waiting = {}  # normalized text -> indices of results waiting for its label
+
+    def apply(labels):
+        for key, label in labels.items():
+            remember_label(key, label, seen, cache)
+            for index in waiting.pop(key):
+                results[index]["final_label"] = label
+
     with open(filename, newline="", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
             log_id = row["log_id"]
             log_entry = row["log_entry"]
             initial = initial_classify(log_entry)
-            final = refine_classification(log_entry, initial)
+            confidence = heuristic_confidence(log_entry, initial)
+            labels = {}
+            if refiner is None:
+                final, source = decide_label(log_entry, initial, confidence, seen, stats, cache, threshold)
+            else:
+                final, source, key = lookup_label(log_entry, initial, confidence, seen, cache, threshold)
+                if final is None:
+                    if key in waiting:
+                        source = "duplicate"
+                    else:
+                        waiting[key] = []
+                        requests = refiner.requests
+                        labels = refiner.add(key, log_entry, initial)
+                        stats["llm_calls"] += refiner.requests - requests
+                    waiting[key].append(len(results))
+                stats["rows"] += 1
+                stats[source] += 1
             results.append({
                 "log_id": log_id,
                 "log_entry": log_entry,
                 "initial_label": initial,
-                "final_label": final
+                "initial_confidence": confidence,
+                "final_label": final,
+                "source": source
             })
+            apply(labels)
+    if refiner is not None:
+        requests = refiner.requests
+        apply(refiner.flush())
+        stats["llm_calls"] += refiner.requests - requests
+    report_stats(stats)
     return results
 
-# Step 7: Run end-to-end
+# Step 7: Streaming, resumable pipeline for large log exports
+CHUNK_ROWS = 5000
+SEEN_MAX_ENTRIES = 100_000  # in-run dedupe map is reset past this; the persistent cache still applies
+
+def read_chunks(filename, chunk_rows, skip_rows=0):
+    """Yields lists of up to `chunk_rows` CSV rows, after skipping the first `skip_rows`."""
+    with open(filename, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for _ in itertools.islice(reader, skip_rows):
+            pass
+        while True:
+            chunk = list(itertools.islice(reader, chunk_rows))
+            if not chunk:
+                return
+            yield chunk
+
+def refine_in_pool(entries, refiner, pool, max_workers):
+    """
+    Yields {key: label} for each batch of `entries` as soon as it is
+    answered. A batch is cut only when a worker is free, so a size the
+    refiner halved applies to the batches after it. If a batch fails, the
+    batches already running are still yielded before the error is raised.
+    """
+    batches = refiner.batches(entries)
+    running = set()
+    error = None
+    while True:
+        if error is None:
+            running |= {pool.submit(refiner.classify, batch)
+                        for batch in itertools.islice(batches, max_workers - len(running))}
+        if not running:
+            break
+        done, running = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is not None:
+                error = error or future.exception()
+                continue
+            yield future.result()
+    if error is not None:
+        raise error
+
+def stream_classify(filename, output_path, checkpoint_path=None, cache=label_cache, threshold=CONFIDENCE_THRESHOLD,
+                    batch_size=BATCH_SIZE, max_workers=8, chunk_rows=CHUNK_ROWS, stats=None):
+    """
+    Classifies a CSV of any size chunk by chunk. Within a chunk, the rows
+    that need the LLM (after gating, dedupe and the cache) are sent in
+    batches on `max_workers` threads, all paced by the shared rate limiter.
+    Each finished chunk is appended to `output_path` (CSV, or a Parquet
+    dataset for a .parquet path) and recorded in the checkpoint, so a rerun
+    after a crash or a 429 storm resumes after the last finished chunk.
+    """
+    checkpoint_path = checkpoint_path or output_path + ".checkpoint"
+    state = load_checkpoint(checkpoint_path)
+    if state["rows_done"]:
+        print(f"⏩ Resuming after {state['rows_done']} rows")
+    stats = stats if stats is not None else new_stats()
+    seen = {}
+    refiner = BatchRefiner(max(batch_size, 1))
+    writer = open_writer(output_path, state)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for chunk in read_chunks(filename, chunk_rows, state["rows_done"]):
+                results, keys, pending = [], [], {}
+                for row in chunk:
+                    initial = initial_classify(row["log_entry"])
+                    confidence = heuristic_confidence(row["log_entry"], initial)
+                    final, source, key = lookup_label(row["log_entry"], initial, confidence, seen, cache, threshold)
+                    if final is None:
+                        if key in pending:
+                            source = "duplicate"
+                        else:
+                            pending[key] = (key, row["log_entry"], initial)
+                    stats["rows"] += 1
+                    stats[source] += 1
+                    keys.append(key)
+                    results.append({
+                        "log_id": row["log_id"],
+                        "log_entry": row["log_entry"],
+                        "initial_label": initial,
+                        "initial_confidence": confidence,
+                        "final_label": final,
+                        "source": source
+                    })
+
+                # Labels are cached as each batch arrives, so a failed batch does not lose the others
+                chunk_labels = {}
+                requests = refiner.requests
+                try:
+                    for labels in refine_in_pool(list(pending.values()), refiner, pool, max_workers):
+                        for key, label in labels.items():
+                            remember_label(key, label, seen, cache)
+                        chunk_labels.update(labels)
+                finally:
+                    stats["llm_calls"] += refiner.requests - requests
+                for result, key in zip(results, keys):
+                    if result["final_label"] is None:
+                        result["final_label"] = chunk_labels[key]
+
+                state.update(writer.write(results))
+                state["rows_done"] += len(chunk)
+                save_checkpoint(checkpoint_path, state)
+                if len(seen) > SEEN_MAX_ENTRIES:
+                    seen.clear()
+                print(f"💾 {state['rows_done']} rows written")
+    except Exception as e:
+        print(f"❌ Stopped after {state['rows_done']} rows ({e}); run again to resume")
+        raise
+    finally:
+        writer.close()
+    report_stats(stats)
+    return stats
+
+def retrain_local_model(cache=label_cache, path=LOCAL_MODEL_PATH, threshold=MODEL_CONFIDENCE):
+    """
+    Trains the local model from every LLM label in the cache. Reports
+    accuracy and speed on a held-out 20% first, then fits on all pairs and
+    saves the model to `path`.
+    """
+    pairs = cache.items() if cache is not None else []
+    if len(pairs) < MIN_TRAINING_PAIRS:
+        print(f"⚠️ Only {len(pairs)} labelled log texts in the cache; need at least {MIN_TRAINING_PAIRS} to train")
+        return None
+    train, test = split_holdout(pairs)
+    start = time.perf_counter()
+    report = evaluate(HashedNgramClassifier(DELAY_CATEGORIES).fit(train), test, threshold)
+    print(f"🧠 Trained on {len(train)} texts in {time.perf_counter() - start:.1f}s; held-out {report['examples']}: "
+          f"accuracy {report['accuracy']:.1%}, {report['coverage']:.1%} answered at >= {threshold:.0%} confidence "
+          f"with {report['confident_accuracy']:.1%} accuracy, {report['us_per_prediction']:.0f} us per prediction")
+    model = HashedNgramClassifier(DELAY_CATEGORIES).fit(pairs)
+    model.save(path)
+    print(f"💾 Model trained on all {len(pairs)} texts saved to {path}")
+    return model
+
+# Step 8: Run end-to-end
 if __name__ == "__main__":
-    generate_dummy_logs()
-    print("🚀 Dummy data generated and saved to logs.csv")
-    print("🔎 Starting classification...")
-    final_results = classify_logs()
-    print("\n📊 Classification Results:\n")
-    for result in final_results:
-        print(f"ID {result['log_id']}:")
-        print(f"  Log: {result['log_entry']}")
-        print(f"  Initial: {result['initial_label']}")
-        print(f"  Final:   {result['final_label']}")
-        print("-" * 50)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Classify delay reasons in maintenance logs.")
+    parser.add_argument("--logs", default="logs.csv", help="CSV with log_id and log_entry columns.")
+    parser.add_argument("--no-generate", action="store_true", help="Classify --logs as is instead of dummy data.")
+    parser.add_argument("--rows", type=int, help="Generate this many dummy rows instead of the 20 samples.")
+    parser.add_argument("--threshold", type=float, default=CONFIDENCE_THRESHOLD,
+                        help="Heuristic confidence needed to skip the LLM.")
+    parser.add_argument("--no-cache", action="store_true", help="Don't use the persistent label cache.")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help="Log entries per LLM request (JSON output; default $BATCH_SIZE or 40); "
+                             "1 sends one request per entry.")
+    parser.add_argument("--output", help="Stream results to this CSV (or .parquet) with a checkpoint; resumable.")
+    parser.add_argument("--concurrency", type=int, default=8, help="LLM requests in flight with --output.")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="Rows read and written per chunk.")
+    parser.add_argument("--retrain", action="store_true",
+                        help="Retrain the local model from the label cache, report held-out accuracy and exit.")
+    args = parser.parse_args()
+
+    if args.retrain:
+        retrain_local_model()
+    else:
+        if not args.no_generate:
+            generate_dummy_logs(args.logs, rows=args.rows)
+            print(f"🚀 Dummy data generated and saved to {args.logs}")
+        print("🔎 Starting classification...")
+        cache = None if args.no_cache else label_cache
+        if args.output:
+            stream_classify(args.logs, args.output, cache=cache, threshold=args.threshold, batch_size=args.batch_size,
+                            max_workers=args.concurrency, chunk_rows=args.chunk_rows)
+        else:
+            final_results = classify_logs(args.logs, cache=cache, threshold=args.threshold, batch_size=args.batch_size)
+            print("\n📊 Classification Results:\n")
+            for result in final_results:
+                print(f"ID {result['log_id']}:")
+                print(f"  Log: {result['log_entry']}")
+                print(f"  Initial: {result['initial_label']} ({result['initial_confidence']:.0%})")
+                print(f"  Final:   {result['final_label']} ({result['source']})")
+                print("-" * 50)
+        if label_cache is not None:
+            label_cache.close()
@@ -0,0 +1,66 @@
+import re
+import sqlite3
+import threading
+
+
+def normalize_log(text):
+    """Key for deduplication: case, digits (stop numbers, times) and spacing don't change the category."""
+    return " ".join(re.sub(r"\d+", "#", text.lower()).split())
+
+
+class LabelCache:
+    """
+    Persistent map of normalized log text -> category decided by the LLM,
+    stored in SQLite, so a message seen in any earlier run is not sent again.
+
+    Entries are namespaced by `model_key` (deployment + prompt version);
+    changing either starts from an empty cache. Lookups are served from an
+    in-memory dict; inserts are committed every `commit_every` writes and on
+    close().
+    """
+
+    def __init__(self, path="label_cache.sqlite", model_key="", commit_every=100):
+        self.model_key = model_key
+        self.commit_every = commit_every
+        self.hits = 0
+        self.misses = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS labels ("
+            " model_key TEXT, text TEXT, label TEXT, PRIMARY KEY (model_key, text))"
+        )
+        self._labels = dict(self._conn.execute("SELECT text, label FROM labels WHERE model_key = ?", (model_key,)))
+
+    def get(self, text):
+        with self._lock:
+            label = self._labels.get(text)
+            if label is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return label
+
+    def put(self, text, label):
+        with self._lock:
+            self._labels[text] = label
+            self._conn.execute("INSERT OR REPLACE INTO labels VALUES (?, ?, ?)", (self.model_key, text, label))
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self._conn.commit()
+                self._pending = 0
+
+    def items(self):
+        """All (normalized text, label) pairs, e.g. as training data for the local model."""
+        with self._lock:
+            return list(self._labels.items())
+
+    def __len__(self):
+        return len(self._labels)
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
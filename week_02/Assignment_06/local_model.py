@@ -0,0 +1,113 @@
+import json
+import math
+import random
+import re
+import time
+import zlib
+
+BUCKETS = 1 << 18  # hashed feature space
+_WORDS = re.compile(r"[a-z#']+")
+
+
+def featurize(text):
+    """Hashed word unigrams, word bigrams and character trigrams of a normalized log text."""
+    words = _WORDS.findall(text)
+    features = [f"w:{w}" for w in words]
+    features += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f" {w} "
+        features += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    # crc32 rather than hash(), which is salted per process
+    return {zlib.crc32(f.encode("utf-8")) & (BUCKETS - 1) for f in features}
+
+
+class HashedNgramClassifier:
+    """
+    Multinomial logistic regression over hashed n-gram features, trained
+    with SGD from (normalized log text, category) pairs. Weights are kept
+    sparsely (only buckets seen in training), so a prediction is a few
+    dozen dict lookups: tens of microseconds on a CPU.
+    """
+
+    def __init__(self, classes):
+        self.classes = list(classes)
+        self.weights = {}  # bucket -> one weight per class
+        self.bias = [0.0] * len(self.classes)
+
+    def _probabilities(self, features):
+        scores = list(self.bias)
+        for f in features:
+            w = self.weights.get(f)
+            if w is not None:
+                for c, value in enumerate(w):
+                    scores[c] += value
+        top = max(scores)
+        exps = [math.exp(s - top) for s in scores]
+        total = sum(exps)
+        return [e / total for e in exps]
+
+    def predict(self, text):
+        """(label, probability) for a normalized log text."""
+        probs = self._probabilities(featurize(text))
+        best = max(range(len(probs)), key=probs.__getitem__)
+        return self.classes[best], probs[best]
+
+    def fit(self, pairs, epochs=10, learning_rate=0.5, seed=0):
+        index = {label: i for i, label in enumerate(self.classes)}
+        examples = [(list(featurize(text)), index[label]) for text, label in pairs if label in index]
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(examples)
+            lr = learning_rate / (1 + epoch)
+            for features, target in examples:
+                probs = self._probabilities(features)
+                grads = [lr * ((1.0 if c == target else 0.0) - p) for c, p in enumerate(probs)]
+                for c, g in enumerate(grads):
+                    self.bias[c] += g
+                for f in features:
+                    w = self.weights.get(f)
+                    if w is None:
+                        w = self.weights[f] = [0.0] * len(self.classes)
+                    for c, g in enumerate(grads):
+                        w[c] += g
+        return self
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"classes": self.classes, "bias": self.bias,
+                       "weights": {str(k): [round(v, 5) for v in w] for k, w in self.weights.items()}}, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        model = cls(data["classes"])
+        model.bias = data["bias"]
+        model.weights = {int(k): w for k, w in data["weights"].items()}
+        return model
+
+
+def split_holdout(pairs, holdout=0.2):
+    """Deterministic train/test split by text hash, so reruns compare like with like."""
+    train, test = [], []
+    for text, label in pairs:
+        (test if zlib.crc32(text.encode("utf-8")) % 100 < holdout * 100 else train).append((text, label))
+    return train, test
+
+
+def evaluate(model, pairs, threshold):
+    """Accuracy overall and on the predictions confident enough to skip the LLM, plus speed."""
+    start = time.perf_counter()
+    predictions = [model.predict(text) for text, _ in pairs]
+    elapsed = time.perf_counter() - start
+    correct = sum(label == expected for (label, _), (_, expected) in zip(predictions, pairs))
+    confident = [(label, expected) for (label, p), (_, expected) in zip(predictions, pairs) if p >= threshold]
+    confident_correct = sum(label == expected for label, expected in confident)
+    n = max(len(pairs), 1)
+    return {
+        "examples": len(pairs),
+        "accuracy": correct / n,
+        "coverage": len(confident) / n,
+        "confident_accuracy": confident_correct / max(len(confident), 1),
+        "us_per_prediction": elapsed / n * 1e6,
+    }
@@ -0,0 +1,177 @@
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CATEGORIES = [
+    "Traffic",
+    "Customer Issue",
+    "Vehicle Issue",
+    "Weather",
+    "Sorting/Labeling Error",
+    "Human Error",
+    "Technical System Failure",
+    "Other"
+]
+# Words the mock "model" knows beyond the heuristic's keywords; checked first, so some guesses get corrected
+HINTS = {
+    "staff": "Human Error",
+    "driver": "Human Error",
+    "batch": "Sorting/Labeling Error",
+    "package": "Sorting/Labeling Error",
+    "security": "Other",
+    "schedule": "Other",
+    "rain": "Weather",
+    "traffic": "Traffic",
+    "scanner": "Technical System Failure",
+    "customer": "Customer Issue",
+}
+
+
+def mock_category(text, guess):
+    """Deterministic label for a log entry, so repeated and cached answers agree."""
+    lowered = text.lower()
+    for word, category in HINTS.items():
+        if word in lowered:
+            return category
+    return guess if guess in CATEGORIES else "Other"
+
+
+def single_entry(request):
+    """(log text, guess) from a refine_classification prompt."""
+    prompt = request.get("messages", [{}])[-1].get("content", "")
+    guess = re.search(r'auto-categorized as "(.*?)"', prompt)
+    log = re.search(r'"""(.*?)"""', prompt, re.DOTALL)
+    return (log.group(1) if log else prompt), (guess.group(1) if guess else "Other")
+
+
+def batch_entries(request):
+    """{"id", "log", "guess"} objects, one per line of a refine_batch user message."""
+    content = request.get("messages", [{}])[-1].get("content", "")
+    entries = []
+    for line in content.splitlines():
+        try:
+            entries.append(json.loads(line))
+        except json.JSONDecodeError:
+            pass
+    return entries
+
+
+class MockChatHandler(BaseHTTPRequestHandler):
+    """
+    Answers POST .../chat/completions like the delay-classification
+    deployment: the single-entry prompt gets a category as plain text, a
+    JSON-mode request gets {"results": [...]} for every entry line. Replies
+    take `latency` seconds plus `item_latency` per batched entry. Returns
+    429 with a Retry-After header when the requests-per-minute quota is
+    exceeded and at random with probability `throttle_rate`, a 500 with
+    probability `error_rate`, and cuts a JSON reply off (finish_reason
+    "length") with probability `truncate_rate`.
+    """
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real endpoint
+    disable_nagle_algorithm = True  # headers and body are separate writes; Nagle would add ~40 ms per reply
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if not self.path.split("?")[0].endswith("/chat/completions"):
+            self._send(404, {"error": {"message": "not found"}})
+            return
+        request = json.loads(body or b"{}")
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+            now = time.monotonic()
+            while server.window and server.window[0] < now - 60:
+                server.window.popleft()
+            over_quota = server.rpm is not None and len(server.window) >= server.rpm
+            if over_quota or random.random() < server.throttle_rate:
+                server.throttled_count += 1
+                retry = 60 - (now - server.window[0]) if over_quota else server.retry_after
+                self._send(429, {"error": {"code": "429", "message": "Rate limit is exceeded."}},
+                           {"retry-after-ms": str(int(retry * 1000)), "retry-after": str(max(1, round(retry)))})
+                return
+            if random.random() < server.error_rate:
+                server.error_count += 1
+                self._send(500, {"error": {"code": "500", "message": "The server had an error."}})
+                return
+            server.window.append(now)
+
+        prompt_tokens = len(body) // 4
+        finish_reason = "stop"
+        if (request.get("response_format") or {}).get("type") == "json_object":
+            entries = batch_entries(request)
+            time.sleep(server.latency + server.item_latency * len(entries))
+            content = json.dumps({"results": [
+                {"id": e.get("id"), "category": mock_category(e.get("log", ""), e.get("guess"))} for e in entries
+            ]})
+            if random.random() < server.truncate_rate:
+                content, finish_reason = content[:len(content) // 2], "length"
+        else:
+            time.sleep(server.latency)
+            content = mock_category(*single_entry(request))
+        completion_tokens = len(content) // 4 + 1
+        with server.lock:
+            server.prompt_tokens += prompt_tokens
+        self._send(200, {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                         "finish_reason": finish_reason}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        })
+
+    def _send(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output readable
+
+
+class MockHTTPServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer whose listen backlog fits every concurrent benchmark client."""
+    request_queue_size = 256
+    daemon_threads = True
+
+
+def start_mock_server(latency=0.05, item_latency=0.002, rpm=None, throttle_rate=0.0, error_rate=0.0,
+                      truncate_rate=0.0, retry_after=1.0, port=0):
+    """Starts the mock server in a background thread and returns (server, endpoint_url)."""
+    server = MockHTTPServer(("127.0.0.1", port), MockChatHandler)
+    server.latency = latency
+    server.item_latency = item_latency
+    server.rpm = rpm
+    server.throttle_rate = throttle_rate
+    server.error_rate = error_rate
+    server.truncate_rate = truncate_rate
+    server.retry_after = retry_after
+    server.lock = threading.Lock()
+    server.window = deque()  # accepted request times in the last minute
+    server.request_count = 0
+    server.throttled_count = 0
+    server.error_count = 0
+    server.prompt_tokens = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    server, url = start_mock_server(rpm=600, throttle_rate=0.02, port=8767)
+    print(f"Mock Azure OpenAI endpoint running at {url} (Ctrl+C to stop)")
+    print(f"Point AZURE_OPENAI_ENDPOINT at it, e.g. AZURE_OPENAI_ENDPOINT={url} python delay_classifier.py")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
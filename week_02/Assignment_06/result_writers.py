@@ -0,0 +1,88 @@
+import csv
+import json
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is optional
+    pa = pq = None
+
+FIELDS = ["log_id", "log_entry", "initial_label", "initial_confidence", "final_label", "source"]
+
+
+def load_checkpoint(path):
+    """Progress of an earlier run: input rows done and how much output belongs to them."""
+    state = {"rows_done": 0, "output_bytes": 0, "parts": 0}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            state.update(json.load(f))
+    return state
+
+
+def save_checkpoint(path, state):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)  # atomic: a crash leaves either the old or the new checkpoint
+
+
+class CsvResultWriter:
+    """
+    Appends result rows to a CSV file. On start the file is cut back to the
+    size recorded in the checkpoint, so rows written after the last
+    checkpoint (by a run that crashed) are not duplicated.
+    """
+
+    def __init__(self, path, state):
+        self.f = open(path, "a", newline="", encoding="utf-8")
+        self.f.truncate(state["output_bytes"])
+        self.writer = csv.DictWriter(self.f, fieldnames=FIELDS)
+        if state["output_bytes"] == 0:
+            self.writer.writeheader()
+
+    def write(self, rows):
+        """Writes and syncs rows; returns the checkpoint fields describing the output so far."""
+        self.writer.writerows(rows)
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        return {"output_bytes": os.fstat(self.f.fileno()).st_size}
+
+    def close(self):
+        self.f.close()
+
+
+class ParquetResultWriter:
+    """
+    Writes each chunk of results as its own part file in a Parquet dataset
+    directory (readable with pyarrow.parquet.read_table or pandas). Parts
+    beyond the checkpoint are deleted on start.
+    """
+
+    def __init__(self, path, state):
+        if pq is None:
+            raise RuntimeError("Parquet output needs pyarrow: pip install pyarrow")
+        self.path = path
+        self.parts = state["parts"]
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            if name.startswith("part-") and int(name[5:10]) >= self.parts:
+                os.remove(os.path.join(path, name))
+
+    def write(self, rows):
+        table = pa.Table.from_pylist(rows)
+        final = os.path.join(self.path, f"part-{self.parts:05d}.parquet")
+        pq.write_table(table, final + ".tmp")
+        os.replace(final + ".tmp", final)
+        self.parts += 1
+        return {"parts": self.parts}
+
+    def close(self):
+        pass
+
+
+def open_writer(path, state):
+    """Parquet dataset for a .parquet path, CSV otherwise."""
+    if path.endswith(".parquet"):
+        return ParquetResultWriter(path, state)
+    return CsvResultWriter(path, state)
@@ -1,11 +1,13 @@
-import os, json
-from flask import Flask, request, render_template
+import os, json, hashlib, threading, uuid, zipfile
+from flask import Flask, request, render_template, jsonify, url_for, Response
 from werkzeug.utils import secure_filename
-from PIL import Image
-import pytesseract
 from dotenv import load_dotenv
 from openai import AzureOpenAI
 from pathlib import Path
+from jobs import JobQueue
+from ocr_pipeline import ocr_image, OCR_VERSION
+from fbc_cache import FBCCache, file_sha256
+from fbc_parser import parse_fbc_text, PARSER_VERSION
 
 # Load .env variables
 load_dotenv()
@@ -30,30 +32,36 @@ def allowed_file(filename):
     ext = filename.rsplit('.', 1)[-1].lower()
     return ext in ALLOWED_EXTENSIONS
 
-def preprocess_image(image_path):
-    img = Image.open(image_path).convert("L")  # grayscale
-    img = img.point(lambda x: 0 if x < 140 else 255)  # binarize
-    return img
-
 def extract_fbc(image_path):
-    text = pytesseract.image_to_string(Image.open(image_path))
+    text = ocr_image(image_path)  # preprocessed, table regions only
     print("OCR Output:\n", text)  # Keep this for debugging
 
-    lines = [line.strip() for line in text.splitlines() if line.strip()]
-    fbc_data = {}
-    for i, line in enumerate(lines):
-        if any(char.isdigit() for char in line):  # crude way to detect value
-            key = lines[i - 1] if i > 0 else f"field_{i}"
-            fbc_data[key] = line
-    return fbc_data
+    # analyte -> {"value", "unit", "low", "high", "flag"}
+    return {r.analyte: r.to_dict() for r in parse_fbc_text(text)}
 
 def summarize_fbc(fbc_data):
-    if not fbc_data or len(fbc_data.keys()) == 1:
+    results = {k: v for k, v in (fbc_data or {}).items() if k != "patient_id"}
+    if not results:
         return "Sorry, the image couldn't be interpreted. Please upload a clearer FBC test."
-    message_text = "Patient FBC results:\n"
-    for k, v in fbc_data.items():
-        if k != "patient_id":
-            message_text += f"- {k}: {v}\n"
+    # Only out-of-range and unchecked values go to the LLM; normal ones need no explanation.
+    abnormal = {k: v for k, v in results.items() if v["flag"] in ("low", "high")}
+    unchecked = {k: v for k, v in results.items() if v["flag"] == "unknown"}
+    normal = len(results) - len(abnormal) - len(unchecked)
+    if not abnormal and not unchecked:
+        return f"All {len(results)} of your FBC results are within the normal reference ranges."
+    message_text = f"Patient FBC results ({normal} other results are within their reference ranges):\n"
+    if abnormal:
+        message_text += "Outside the reference range:\n"
+    for k, v in abnormal.items():
+        if v["low"] is None:
+            message_text += f"- {k}: {v['value']:g} {v['unit'] or ''} (flagged {v['flag']} by the lab)\n"
+        else:
+            message_text += f"- {k}: {v['value']:g} {v['unit'] or ''} ({v['flag']}; reference {v['low']:g}-{v['high']:g})\n"
+    if unchecked:
+        message_text += ("Not checked automatically (no unit printed, or no reference range for the printed unit); "
+                         "say whether each value looks normal and tell the patient it was not checked:\n")
+    for k, v in unchecked.items():
+        message_text += f"- {k}: {v['value']:g} {v['unit'] or ''}\n"
     print("Message sent to OpenAI:\n", message_text)
     response = client.chat.completions.create(
         model=deployment,
@@ -64,9 +72,164 @@ def summarize_fbc(fbc_data):
     )
     return response.choices[0].message.content.strip()
 
+def save_fbc_data(fbc_data):
+    with open(os.path.join(app.config['UPLOAD_FOLDER'], f"{fbc_data['patient_id']}.json"), "w", encoding="utf-8") as f:
+        json.dump(fbc_data, f, indent=2)
+
+def save_fbc_batch(records):
+    for fbc_data in records:
+        save_fbc_data(fbc_data)
+    if records:
+        print(f"Saved {len(records)} patient records")
+
+def on_ocr_done(fbc_data, context):
+    # Batch uploads are written in bulk by write_batch instead.
+    if not context["batch"]:
+        save_fbc_data(fbc_data)
+
+# Results of images already processed, so re-uploads skip OCR and the LLM.
+fbc_cache = FBCCache(
+    os.path.join(app.config['UPLOAD_FOLDER'], "fbc_cache.sqlite"),
+    version=f"ocr{OCR_VERSION}-parser{PARSER_VERSION}",
+    max_entries=int(os.getenv("FBC_CACHE_MAX_ENTRIES", 5000)),
+)
+
+def cache_result(fbc_data, explanation, context):
+    fbc_cache.put(context["sha256"], fbc_data, explanation)
+
+# OCR runs in worker processes and summarization in a bounded thread pool,
+# so uploads return immediately instead of holding a Flask worker.
+job_queue = JobQueue(
+    extract_fbc,
+    summarize_fbc,
+    on_ocr_done=on_ocr_done,
+    on_done=cache_result,
+    ocr_workers=int(os.getenv("OCR_WORKERS", os.cpu_count() or 1)),
+    summarize_workers=int(os.getenv("SUMMARIZE_WORKERS", 4)),
+    delete_images=True,  # the image is only needed for OCR; results live in the cache and patient JSON
+)
+
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", 500))
+BATCH_MAX_FILE_BYTES = 20 * 1024 * 1024
+BATCH_WRITE_SIZE = 50  # patient JSON files written per bulk save
+
+def upload_path(filename):
+    # A file of its own per upload: OCR reads it later, when another upload with the same name may have arrived
+    return os.path.join(app.config['UPLOAD_FOLDER'], f"{uuid.uuid4().hex}_{secure_filename(filename)}")
+
+def cached_job(sha256, patient_id, batch):
+    """ID of a finished job if this image was processed before, else None."""
+    cached = fbc_cache.get(sha256)
+    if not cached:
+        return None
+    fbc_data, explanation = cached
+    fbc_data["patient_id"] = patient_id
+    if not batch:
+        save_fbc_data(fbc_data)
+    return job_queue.add_finished(patient_id, fbc_data, explanation)
+
+def queue_upload(filename, data, batch=False, patient_id=None):
+    """Returns the ID of the job that will (or already did) process an uploaded image; saves it only for OCR."""
+    patient_id = patient_id or os.path.splitext(secure_filename(filename))[0]
+    sha256 = file_sha256(data)
+    job_id = cached_job(sha256, patient_id, batch)
+    if job_id:
+        return job_id
+    image_path = upload_path(filename)
+    with open(image_path, "wb") as f:
+        f.write(data)
+    return job_queue.submit(image_path, patient_id, context={"sha256": sha256, "batch": batch})
+
+def queue_saved_image(image_path, sha256, patient_id):
+    """queue_upload for a batch image already saved by read_batch_files."""
+    job_id = cached_job(sha256, patient_id, batch=True)
+    if job_id:
+        os.remove(image_path)
+        return job_id
+    return job_queue.submit(image_path, patient_id, context={"sha256": sha256, "batch": True})
+
+def save_stream(filename, stream):
+    """Copies an uploaded file to disk in blocks, hashing it on the way; returns (path, sha256)."""
+    image_path = upload_path(filename)
+    digest = hashlib.sha256()
+    with open(image_path, "wb") as f:
+        for block in iter(lambda: stream.read(1024 * 1024), b""):
+            digest.update(block)
+            f.write(block)
+    return image_path, digest.hexdigest()
+
+def read_batch_files(files):
+    """
+    (filename, path, sha256) for every image in the upload, including images
+    inside zip files (named by their path in the archive, e.g. lab1/report.png),
+    plus errors. Images are streamed to disk, and reading stops at BATCH_MAX_FILES.
+    """
+    images, errors = [], []
+    truncated = False
+
+    def add(filename, stream):
+        nonlocal truncated
+        if len(images) >= BATCH_MAX_FILES:
+            truncated = True
+            return False
+        images.append((filename, *save_stream(filename, stream)))
+        return True
+
+    for file in files:
+        if file.filename.lower().endswith(".zip"):
+            try:
+                with zipfile.ZipFile(file.stream) as archive:
+                    for entry in archive.infolist():
+                        name = os.path.basename(entry.filename)
+                        if entry.is_dir() or not name or not allowed_file(name):
+                            continue
+                        if entry.file_size > BATCH_MAX_FILE_BYTES:
+                            errors.append(f"{name}: file too large")
+                            continue
+                        with archive.open(entry) as stream:
+                            if not add(entry.filename, stream):
+                                break
+            except zipfile.BadZipFile:
+                errors.append(f"{file.filename}: not a valid zip file")
+        elif allowed_file(file.filename):
+            add(file.filename, file.stream)
+        elif file.filename:
+            errors.append(f"{file.filename}: only jpg, png or zip files are accepted")
+        if truncated:
+            errors.append(f"Only the first {BATCH_MAX_FILES} images were processed")
+            break
+    return images, errors
+
+def batch_patient_ids(filenames):
+    """Patient IDs from file names, made unique within the batch (report, report-2, ...)."""
+    ids, used = [], set()
+    for filename in filenames:
+        base = os.path.splitext(secure_filename(filename))[0]
+        patient_id, n = base, 1
+        while patient_id in used:
+            n += 1
+            patient_id = f"{base}-{n}"
+        used.add(patient_id)
+        ids.append(patient_id)
+    return ids
+
+def write_batch(job_ids):
+    """Writes the patient JSON of a batch in bulk as its jobs finish, independently of the client stream."""
+    records = []
+    for job in job_queue.as_completed(job_ids):
+        if job["fbc_data"] is not None:
+            records.append(job["fbc_data"])
+        if len(records) >= BATCH_WRITE_SIZE:
+            save_fbc_batch(records)
+            records = []
+    save_fbc_batch(records)
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 @app.route("/", methods=["GET", "POST"])
 def index():
-    explanation = ""
+    job_id = ""
     error = ""
     if request.method == "POST":
         file = request.files.get("file")
@@ -75,20 +238,45 @@ def index():
         elif not allowed_file(file.filename):
             error = "Sorry, we only accept jpg or png format"
         else:
-            filename = secure_filename(file.filename)
-            patient_id = os.path.splitext(filename)[0]
-            image_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(image_path)
+            job_id = queue_upload(file.filename, file.read())
+
+        if request.accept_mimetypes.best == "application/json":
+            if error:
+                return jsonify({"error": error}), 400
+            return jsonify({"job_id": job_id, "status_url": url_for("job_status", job_id=job_id)}), 202
+
+    return render_template("index.html", job_id=job_id, error=error)
 
-            fbc_data = extract_fbc(image_path)
-            fbc_data["patient_id"] = patient_id
+@app.route("/batch", methods=["POST"])
+def batch_upload():
+    """
+    Accepts many images (and/or zip files of images) in the `files` field and
+    streams one Server-Sent Event per report as soon as it is processed.
+    """
+    images, errors = read_batch_files(request.files.getlist("files"))
+    if not images:
+        return jsonify({"error": "No images found", "details": errors}), 400
+    patient_ids = batch_patient_ids(filename for filename, _, _ in images)
+    job_ids = [queue_saved_image(image_path, sha256, patient_id)
+               for (_, image_path, sha256), patient_id in zip(images, patient_ids)]
+    threading.Thread(target=write_batch, args=(job_ids,), daemon=True).start()
 
-            with open(os.path.join(app.config['UPLOAD_FOLDER'], f"{patient_id}.json"), "w", encoding="utf-8") as f:
-                json.dump(fbc_data, f, indent=2)
+    def events():
+        yield sse("accepted", {"jobs": len(job_ids), "errors": errors})
+        failed = 0
+        for job in job_queue.as_completed(job_ids):
+            failed += job["status"] == "failed"
+            yield sse("result", job)
+        yield sse("end", {"jobs": len(job_ids), "failed": failed})
 
-            explanation = summarize_fbc(fbc_data)
+    return Response(events(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
 
-    return render_template("index.html", explanation=explanation, error=error)
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job ID"}), 404
+    return jsonify(job)
 
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
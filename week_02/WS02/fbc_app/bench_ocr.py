@@ -0,0 +1,39 @@
+import argparse
+import glob
+import statistics
+import time
+
+import pytesseract
+from PIL import Image
+
+from ocr_pipeline import detect_table_regions, ocr_image, preprocess_image
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-image OCR latency: raw full-page tesseract vs the preprocessing pipeline.")
+    parser.add_argument("images", nargs="*", help="Images to OCR (default: uploads/*.png and *.jpg).")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per image; the median is reported.")
+    args = parser.parse_args()
+
+    images = args.images or sorted(glob.glob("uploads/*.png") + glob.glob("uploads/*.jpg"))
+    print(f"{'image':<30} {'raw OCR':>9} {'prep':>8} {'pipeline':>9} {'regions':>8} {'chars raw/new':>14}")
+    for path in images:
+        raw_time, raw_text = timed(lambda: pytesseract.image_to_string(Image.open(path)), args.repeat)
+        prep_time, binary = timed(lambda: preprocess_image(path), args.repeat)
+        regions = detect_table_regions(binary)
+        new_time, new_text = timed(lambda: ocr_image(path), args.repeat)
+        print(f"{path:<30} {raw_time * 1000:7.0f}ms {prep_time * 1000:6.0f}ms {new_time * 1000:7.0f}ms "
+              f"{len(regions):8d} {len(raw_text):6d}/{len(new_text):<6d}")
+
+
+if __name__ == "__main__":
+    main()
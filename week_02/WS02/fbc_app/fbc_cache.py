@@ -0,0 +1,71 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+def file_sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+class FBCCache:
+    """
+    Remembers the OCR output and explanation for every image already processed.
+
+    Entries are found only by the exact SHA-256 of the upload, so a re-upload
+    of the same file skips both tesseract and the LLM. (Perceptual hashes are
+    not used: two reports from the same lab layout with different values can
+    hash identically.) Entries are stored under `version`, the OCR/parser
+    version that produced them; entries of any other version are dropped on
+    open. At most `max_entries` are kept; the least recently used are
+    evicted first.
+    """
+
+    def __init__(self, path, version="", max_entries=5000):
+        self.version = version
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("DROP TABLE IF EXISTS entries")  # earlier, unversioned format
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " sha256 TEXT PRIMARY KEY, version TEXT, fbc_data TEXT, explanation TEXT, last_used REAL)"
+        )
+        self.conn.execute("DELETE FROM results WHERE version != ?", (version,))
+        self.conn.commit()
+        # Known keys kept in memory so misses don't hit the database
+        self.keys = {sha256 for (sha256,) in self.conn.execute("SELECT sha256 FROM results")}
+
+    def get(self, sha256):
+        """Returns (fbc_data, explanation) for a known image, or None."""
+        with self.lock:
+            if sha256 not in self.keys:
+                self.misses += 1
+                return None
+            row = self.conn.execute("SELECT fbc_data, explanation FROM results WHERE sha256 = ?", (sha256,)).fetchone()
+            self.conn.execute("UPDATE results SET last_used = ? WHERE sha256 = ?", (time.time(), sha256))
+            self.conn.commit()
+            self.hits += 1
+            return json.loads(row[0]), row[1]
+
+    def put(self, sha256, fbc_data, explanation):
+        fbc_data = {k: v for k, v in fbc_data.items() if k != "patient_id"}
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                (sha256, self.version, json.dumps(fbc_data), explanation, time.time()),
+            )
+            self.keys.add(sha256)
+            overflow = len(self.keys) - self.max_entries
+            if overflow > 0:
+                evicted = self.conn.execute(
+                    "SELECT sha256 FROM results ORDER BY last_used LIMIT ?", (overflow,)
+                ).fetchall()
+                self.conn.executemany("DELETE FROM results WHERE sha256 = ?", evicted)
+                for (key,) in evicted:
+                    self.keys.discard(key)
+            self.conn.commit()
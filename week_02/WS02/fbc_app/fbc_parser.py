@@ -0,0 +1,184 @@
+import re
+import time
+from typing import NamedTuple, Optional
+
+PARSER_VERSION = "3"  # bump when parsing or reference ranges change (invalidates cached results)
+
+# Canonical analyte name -> spellings seen on lab reports (matched case- and punctuation-insensitively)
+ANALYTE_ALIASES = {
+    "Haemoglobin": ["haemoglobin", "hemoglobin", "hb", "hgb"],
+    "Total Leucocyte Count": ["total leucocyte count", "total leukocyte count", "tlc", "wbc", "wbc count",
+                              "white blood cell count", "total wbc count", "leucocytes", "leukocytes"],
+    "Neutrophils": ["neutrophils", "neut", "neu"],
+    "Lymphocytes": ["lymphocytes", "lymph", "lym"],
+    "Eosinophils": ["eosinophils", "eos"],
+    "Monocytes": ["monocytes", "mono"],
+    "Basophils": ["basophils", "baso"],
+    "Absolute Neutrophils": ["absolute neutrophils", "absolute neutrophil count", "anc"],
+    "Absolute Lymphocytes": ["absolute lymphocytes", "absolute lymphocyte count", "alc"],
+    "Absolute Eosinophils": ["absolute eosinophils", "absolute eosinophil count", "aec"],
+    "Absolute Monocytes": ["absolute monocytes", "absolute monocyte count", "amc"],
+    "Absolute Basophils": ["absolute basophils", "absolute basophil count"],
+    "RBC Count": ["rbc count", "rbc", "red blood cell count", "erythrocytes", "total rbc count"],
+    "MCV": ["mcv", "mean corpuscular volume"],
+    "MCH": ["mch", "mean corpuscular haemoglobin", "mean corpuscular hemoglobin"],
+    "MCHC": ["mchc", "mean corpuscular haemoglobin concentration", "mean corpuscular hemoglobin concentration"],
+    "Haematocrit": ["hct", "haematocrit", "hematocrit", "pcv", "packed cell volume"],
+    "RDW-CV": ["rdw-cv", "rdw cv", "rdw"],
+    "RDW-SD": ["rdw-sd", "rdw sd"],
+    "Platelet Count": ["platelet count", "platelets", "plt", "platelet"],
+    "PCT": ["pct", "plateletcrit"],
+    "MPV": ["mpv", "mean platelet volume"],
+    "PDW": ["pdw", "platelet distribution width"],
+}
+
+# Adult reference ranges (low, high, unit), used when the report does not print its own.
+REFERENCE_RANGES = {
+    "Haemoglobin": (12.0, 17.0, "g/dL"),
+    "Total Leucocyte Count": (4000, 11000, "/cumm"),
+    "Neutrophils": (40, 80, "%"),
+    "Lymphocytes": (20, 40, "%"),
+    "Eosinophils": (1, 6, "%"),
+    "Monocytes": (2, 10, "%"),
+    "Basophils": (0, 1, "%"),
+    "Absolute Neutrophils": (2000, 7000, "/cumm"),
+    "Absolute Lymphocytes": (1000, 3000, "/cumm"),
+    "Absolute Eosinophils": (20, 500, "/cumm"),
+    "Absolute Monocytes": (200, 1000, "/cumm"),
+    "Absolute Basophils": (0, 100, "/cumm"),
+    "RBC Count": (4.0, 5.9, "million/cumm"),
+    "MCV": (81, 101, "fL"),
+    "MCH": (27, 32, "pg"),
+    "MCHC": (31.5, 34.5, "g/dL"),
+    "Haematocrit": (36, 50, "%"),
+    "RDW-CV": (11.6, 14.0, "%"),
+    "RDW-SD": (39, 46, "fL"),
+    "Platelet Count": (150000, 410000, "/cumm"),
+    "MPV": (7.5, 11.5, "fL"),
+}
+
+# Values a row without a printed unit can take in the built-in range's unit. Outside these the lab is
+# probably using another unit (Hb 135 g/L, platelets 250 x10^3/uL), so the built-in range does not apply.
+PLAUSIBLE_VALUES = {
+    "Haemoglobin": (2, 25),
+    "Total Leucocyte Count": (500, 200000),
+    "Neutrophils": (0, 100),
+    "Lymphocytes": (0, 100),
+    "Eosinophils": (0, 100),
+    "Monocytes": (0, 100),
+    "Basophils": (0, 100),
+    "Absolute Neutrophils": (100, 150000),
+    "Absolute Lymphocytes": (100, 150000),
+    "Absolute Eosinophils": (5, 20000),
+    "Absolute Monocytes": (20, 20000),
+    "Absolute Basophils": (1, 5000),
+    "RBC Count": (1, 10),
+    "MCV": (40, 150),
+    "MCH": (10, 50),
+    "MCHC": (20, 45),
+    "Haematocrit": (10, 75),
+    "RDW-CV": (5, 40),
+    "RDW-SD": (20, 120),
+    "Platelet Count": (5000, 2000000),
+    "MPV": (4, 20),
+}
+
+def _alias_key(name):
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+ALIAS_LOOKUP = {_alias_key(alias): analyte for analyte, aliases in ANALYTE_ALIASES.items() for alias in aliases}
+
+_NUMBER = r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?"
+# One result row: name, value, optional H/L marker, optional printed range, optional unit.
+RESULT_LINE = re.compile(
+    rf"""^[ \t]*(?P<name>[A-Za-z][A-Za-z0-9 ()/.\-]*?[A-Za-z)])[ \t:]+
+    (?P<value>{_NUMBER})
+    (?:[ \t]*(?P<marker>\b(?:(?i:high|low)|H|L)\b|\*))?
+    (?:[ \t]+(?P<low>{_NUMBER})[ \t]*(?:-|–|to)[ \t]*(?P<high>{_NUMBER}))?
+    (?:[ \t]+(?!(?:(?i:high|low)|H|L)\b)(?P<unit>(?:10\^|[^\s\d])[^\n]*?))?[ \t]*$""",
+    re.VERBOSE | re.MULTILINE,
+)
+
+class FBCResult(NamedTuple):
+    analyte: str
+    value: float
+    unit: Optional[str]
+    low: Optional[float]
+    high: Optional[float]
+    flag: str  # "low", "high", "normal" or "unknown" (no reference range)
+
+    def to_dict(self):
+        return {"value": self.value, "unit": self.unit, "low": self.low, "high": self.high, "flag": self.flag}
+
+MARKER_FLAGS = {"h": "high", "high": "high", "l": "low", "low": "low"}
+
+def _lookup_analyte(name):
+    """Canonical analyte for a printed name; "Haemoglobin (Hb)" is tried whole, without and inside the brackets."""
+    analyte = ALIAS_LOOKUP.get(_alias_key(name))
+    if analyte is None and "(" in name:
+        outside = re.sub(r"\([^)]*\)", " ", name)
+        analyte = ALIAS_LOOKUP.get(_alias_key(outside))
+        for inside in re.findall(r"\(([^)]*)\)", name):
+            analyte = analyte or ALIAS_LOOKUP.get(_alias_key(inside))
+    return analyte
+
+def _number(text):
+    return float(text.replace(",", "")) if text else None
+
+def parse_fbc_text(text):
+    """Parses one OCR output into FBCResult records, in report order. Unknown rows are skipped."""
+    results = {}
+    for match in RESULT_LINE.finditer(text):
+        analyte = _lookup_analyte(match["name"])
+        if analyte is None or analyte in results:
+            continue
+        value = _number(match["value"])
+        low, high, unit = _number(match["low"]), _number(match["high"]), match["unit"]
+        if low is None:
+            default = REFERENCE_RANGES.get(analyte)
+            # Only trust the built-in range if the report prints the same unit, or prints none and the
+            # value has the magnitude of that unit.
+            if default and unit is None:
+                smallest, largest = PLAUSIBLE_VALUES[analyte]
+                if smallest <= value <= largest:
+                    low, high, unit = default
+            elif default and _alias_key(unit) == _alias_key(default[2]):
+                low, high = default[0], default[1]
+        if low is None:
+            # No usable range: fall back to the lab's own H/L marker, if any
+            flag = MARKER_FLAGS.get((match["marker"] or "").lower(), "unknown")
+        elif value < low:
+            flag = "low"
+        elif value > high:
+            flag = "high"
+        else:
+            flag = "normal"
+        results[analyte] = FBCResult(analyte, value, unit, low, high, flag)
+    return list(results.values())
+
+def parse_many(texts):
+    """Batch API: parses many OCR outputs, returning one list of records per text."""
+    return [parse_fbc_text(text) for text in texts]
+
+def abnormal(results):
+    return [r for r in results if r.flag in ("low", "high")]
+
+if __name__ == "__main__":
+    sample = """TEST DESCRIPTION RESULT REF. RANGE UNIT
+Total Leucocyte Count 5000 4000 - 10000 /cumm
+Differential Leucocyte Count
+Neutrophils 50 40 - 80 %
+Lymphocytes 40 20 - 40 %
+Haemoglobin (Hb) 15 13-17 g/dL
+MCV 80.00 L 81 - 101 fL
+MCHC 37.50 31.5 - 34.5 g/dL
+Platelet Count 300000 150000 - 410000 /cumm
+PCT 35
+"""
+    for record in parse_fbc_text(sample):
+        print(record)
+    texts = [sample] * 10000
+    start = time.perf_counter()
+    parse_many(texts)
+    elapsed = time.perf_counter() - start
+    print(f"Parsed {len(texts)} OCR outputs in {elapsed:.2f}s ({len(texts) / elapsed:,.0f}/s)")
@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+def run_in_worker(fn, *args):
+    """
+    Calls fn in a pool process. Exceptions are re-raised as RuntimeError
+    because some (e.g. pytesseract's) cannot be unpickled in the parent,
+    which would break the whole pool.
+    """
+    try:
+        return fn(*args)
+    except Exception as e:
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+
+
+class JobQueue:
+    """
+    Runs uploads off the request thread.
+
+    OCR is CPU-bound, so it runs in a process pool (one worker per core by
+    default). The LLM call is I/O-bound, so it runs in a small thread pool,
+    which also caps how many Azure requests are in flight. Finished jobs are
+    kept for `ttl` seconds so clients can fetch the result. With
+    `delete_images`, each image is deleted once its OCR has finished or failed.
+    """
+
+    def __init__(self, ocr_fn, summarize_fn, on_ocr_done=None, on_done=None, ocr_workers=None, summarize_workers=4,
+                 ttl=3600, delete_images=False):
+        self.ocr_fn = ocr_fn
+        self.summarize_fn = summarize_fn
+        self.on_ocr_done = on_ocr_done
+        self.on_done = on_done
+        self.delete_images = delete_images
+        self.ttl = ttl
+        self.ocr_workers = ocr_workers
+        self.ocr_pool = ProcessPoolExecutor(max_workers=ocr_workers)
+        self.summarize_pool = ThreadPoolExecutor(max_workers=summarize_workers)
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.finished = threading.Condition(self.lock)  # notified whenever a job finishes
+
+    def _new_job(self, patient_id, **fields):
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "patient_id": patient_id,
+            "status": "queued",
+            "fbc_data": None,
+            "explanation": None,
+            "error": None,
+            "created": time.time(),
+            "finished": None,
+        }
+        job.update(fields)
+        with self.lock:
+            self._prune()
+            self.jobs[job_id] = job
+        return job_id
+
+    def add_finished(self, patient_id, fbc_data, explanation):
+        """Records a job whose result is already known (e.g. from a cache)."""
+        return self._new_job(patient_id, status="done", fbc_data=fbc_data, explanation=explanation,
+                             finished=time.time())
+
+    def submit(self, image_path, patient_id, context=None):
+        """
+        Queues an uploaded image and returns the new job's ID immediately.
+        `context` is passed through to the on_ocr_done and on_done callbacks.
+        """
+        job_id = self._new_job(patient_id, context=context)
+        try:
+            future = self.ocr_pool.submit(run_in_worker, self.ocr_fn, image_path)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool.
+            self.ocr_pool = ProcessPoolExecutor(max_workers=self.ocr_workers)
+            future = self.ocr_pool.submit(run_in_worker, self.ocr_fn, image_path)
+        future.add_done_callback(lambda f: self._ocr_finished(job_id, image_path, f))
+        return job_id
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            return {k: v for k, v in job.items() if k != "context"}
+
+    def as_completed(self, job_ids):
+        """Yields each job (as returned by get) once it is done or failed, in completion order."""
+        pending = set(job_ids)
+        while pending:
+            with self.finished:
+                while True:
+                    ready = [j for j in pending if self.jobs.get(j) is None or self.jobs[j]["finished"]]
+                    if ready:
+                        break
+                    self.finished.wait()
+                pending.difference_update(ready)
+                # jobs pruned in the meantime are skipped
+                done = [{k: v for k, v in self.jobs[j].items() if k != "context"} for j in ready if j in self.jobs]
+            yield from done
+
+    def _update(self, job_id, **fields):
+        with self.lock:
+            self.jobs[job_id].update(fields)
+            if fields.get("finished"):
+                self.finished.notify_all()
+
+    def _fail(self, job_id, stage, error):
+        print(f"Job {job_id} failed during {stage}: {error}")
+        self._update(job_id, status="failed", error=f"{stage} failed: {error}", finished=time.time())
+
+    def _ocr_finished(self, job_id, image_path, future):
+        if self.delete_images:
+            try:
+                os.remove(image_path)
+            except OSError as e:
+                print(f"Job {job_id}: could not delete {image_path}: {e}")
+        try:
+            fbc_data = future.result()
+            fbc_data["patient_id"] = self.jobs[job_id]["patient_id"]
+            if self.on_ocr_done:
+                self.on_ocr_done(fbc_data, self.jobs[job_id]["context"])
+        except Exception as e:
+            self._fail(job_id, "OCR", e)
+            return
+        self._update(job_id, status="summarizing", fbc_data=fbc_data)
+        self.summarize_pool.submit(self._summarize, job_id, fbc_data)
+
+    def _summarize(self, job_id, fbc_data):
+        try:
+            explanation = self.summarize_fn(fbc_data)
+        except Exception as e:
+            self._fail(job_id, "Summarization", e)
+            return
+        self._update(job_id, status="done", explanation=explanation, finished=time.time())
+        if self.on_done:
+            try:
+                self.on_done(fbc_data, explanation, self.jobs[job_id]["context"])
+            except Exception as e:
+                print(f"Job {job_id}: on_done callback failed: {e}")
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl
+        expired = [job_id for job_id, job in self.jobs.items() if job["finished"] and job["finished"] < cutoff]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    def shutdown(self):
+        self.ocr_pool.shutdown()
+        self.summarize_pool.shutdown()
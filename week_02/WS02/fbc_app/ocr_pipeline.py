@@ -0,0 +1,116 @@
+import numpy as np
+import pytesseract
+from PIL import Image
+
+OCR_VERSION = "2"  # bump when preprocessing or tesseract settings change (invalidates cached results)
+
+# Tesseract is tuned for ~300 DPI scans; an A4 page at 300 DPI is 2480 px wide.
+TARGET_WIDTH = 2480
+MIN_SCALE, MAX_SCALE = 0.25, 3.0
+SKEW_ANGLES = np.arange(-5.0, 5.25, 0.25)
+TESSERACT_CONFIG = "--psm 6"  # each region is a uniform block of text
+
+def to_grayscale(img):
+    """Grayscale, with transparent areas (common in PNG screenshots) turned white rather than black."""
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGBA")
+        background = Image.new("RGBA", img.size, (255, 255, 255, 255))
+        background.alpha_composite(img)
+        img = background
+    return img.convert("L")
+
+def rescale(gray):
+    scale = min(max(TARGET_WIDTH / gray.width, MIN_SCALE), MAX_SCALE)
+    if abs(scale - 1) < 0.1:
+        return gray
+    size = (round(gray.width * scale), round(gray.height * scale))
+    return gray.resize(size, Image.LANCZOS if scale < 1 else Image.BICUBIC)
+
+def otsu_threshold(gray):
+    """Threshold that best separates ink from paper, from the 256-bin histogram."""
+    hist = np.array(gray.histogram(), dtype=np.float64)
+    levels = np.arange(256)
+    weight_bg = np.cumsum(hist)
+    weight_fg = weight_bg[-1] - weight_bg
+    cum_mean = np.cumsum(hist * levels)
+    mean_bg = cum_mean / np.maximum(weight_bg, 1)
+    mean_fg = (cum_mean[-1] - cum_mean) / np.maximum(weight_fg, 1)
+    between_var = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return int(np.argmax(between_var)) + 1
+
+def binarize(gray, threshold):
+    # A 256-entry lookup table is applied in C, unlike a per-pixel Python lambda.
+    return gray.point([0 if v < threshold else 255 for v in range(256)])
+
+def estimate_skew(binary):
+    """Angle (degrees) whose rotation gives the sharpest row profile, i.e. level text lines."""
+    small = binary.copy()
+    small.thumbnail((800, 800))
+    best_angle, best_score = 0.0, -1.0
+    for angle in SKEW_ANGLES:
+        rotated = small.rotate(angle, resample=Image.NEAREST, fillcolor=255)
+        profile = (np.asarray(rotated) < 128).sum(axis=1).astype(np.int64)
+        score = float(np.sum(np.diff(profile) ** 2))
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+def preprocess_image(image):
+    """Grayscale, rescale to ~300 DPI, binarize with Otsu's threshold and deskew."""
+    if not isinstance(image, Image.Image):
+        image = Image.open(image)
+    gray = rescale(to_grayscale(image))
+    binary = binarize(gray, otsu_threshold(gray))
+    angle = estimate_skew(binary)
+    if abs(angle) >= 0.25:
+        binary = binary.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+        binary = binarize(binary, 128)
+    return binary
+
+def _runs(mask):
+    """(start, end) pairs of consecutive True values in a 1-D boolean array."""
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return list(zip(edges[::2], edges[1::2]))
+
+def detect_table_regions(binary, min_rows=3, max_gap_lines=2):
+    """
+    Finds the tabular parts of a report: runs of text lines that are split
+    into two or more columns by wide gaps (test name, value, range, unit).
+    Up to `max_gap_lines` single-column lines (section headings) may sit
+    inside a region. Returns (left, top, right, bottom) boxes.
+    """
+    ink = np.asarray(binary) < 128
+    height, width = ink.shape
+    column_gap = max(int(width * 0.03), 8)
+    lines = _runs(ink.sum(axis=1) >= 2)
+
+    regions, current, rows_in_current, gap_lines = [], None, 0, 0
+    for top, bottom in lines:
+        columns = _runs(ink[top:bottom].any(axis=0))
+        gaps = sum(1 for (_, end), (start, _) in zip(columns, columns[1:]) if start - end >= column_gap)
+        if gaps >= 1:
+            if current is None:
+                current, rows_in_current = [top, bottom], 0
+            current[1] = bottom
+            rows_in_current += 1
+            gap_lines = 0
+        elif current is not None:
+            gap_lines += 1
+            if gap_lines > max_gap_lines:
+                if rows_in_current >= min_rows:
+                    regions.append(tuple(current))
+                current, gap_lines = None, 0
+    if current is not None and rows_in_current >= min_rows:
+        regions.append(tuple(current))
+
+    pad = max(int(height * 0.005), 4)
+    return [(0, max(int(top) - pad, 0), width, min(int(bottom) + pad, height)) for top, bottom in regions]
+
+def ocr_image(image_path):
+    """OCR only the table regions of a preprocessed image (the whole page if none are found)."""
+    binary = preprocess_image(image_path)
+    regions = detect_table_regions(binary) or [(0, 0, binary.width, binary.height)]
+    return "\n".join(
+        pytesseract.image_to_string(binary.crop(box), config=TESSERACT_CONFIG) for box in regions
+    )
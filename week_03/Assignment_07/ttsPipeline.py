@@ -1,37 +1,205 @@
+import argparse
+import queue
+import re
+import threading
+import time
 from transformers import VitsModel, AutoTokenizer
 import torch
 import numpy as np
 import soundfile as sf
-from pydub import AudioSegment
-from huggingface_hub import snapshot_download
+
+MODEL_NAME = "facebook/mms-tts-vie"
+
 # ────────────────────────────────
 # 1️⃣ Load model and tokenizer
 # ────────────────────────────────
-model = VitsModel.from_pretrained("facebook/mms-tts-vie")
-tokenizer = AutoTokenizer.from_pretrained("facebook/mms-tts-vie")
-print("✅ Model and tokenizer loaded")
-# ────────────────────────────────
-# 2️⃣ Input text
-# ────────────────────────────────
-text = "Xin chào anh em đến với bài tập của khoá AI Application Engineer"
+def load_model(model_name=MODEL_NAME):
+    """Loads the model and tokenizer once; keep them around and reuse them for every utterance."""
+    model = VitsModel.from_pretrained(model_name)
+    model.eval()
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    print("✅ Model and tokenizer loaded")
+    return model, tokenizer
 
 # ────────────────────────────────
-# 3️⃣ Generate waveform
+# 2️⃣ Generate waveforms
 # ────────────────────────────────
-inputs = tokenizer(text, return_tensors="pt")
-with torch.no_grad():
-    output = model(**inputs).waveform
-print("✅ Inputs tokenized")
+def synthesize(texts, model, tokenizer):
+    """
+    Synthesizes a list of texts in one forward pass. The inputs are padded
+    to the longest text; each output waveform is trimmed to its own length
+    (sequence_lengths). VITS samples noise on every call, so the audio is
+    equivalent to, not identical with, one-at-a-time synthesis.
+    Returns float32 numpy arrays at model.config.sampling_rate.
+    """
+    inputs = tokenizer(texts, return_tensors="pt", padding=True)
+    with torch.inference_mode():
+        output = model(**inputs)
+    waveforms = output.waveform.cpu().numpy().astype(np.float32)
+    lengths = output.sequence_lengths.tolist()
+    return [waveforms[i, :lengths[i]] for i in range(len(texts))]
+
 # ────────────────────────────────
-# 4️⃣ Save to WAV
+# 2️⃣b Streaming synthesis, sentence by sentence
 # ────────────────────────────────
-waveform = output.squeeze().cpu().numpy().astype(np.float32)
-sf.write("output.wav", waveform, model.config.sampling_rate)
-print("✅ Waveform generated")
+SENTENCE_BREAK = re.compile(r"(?<=[.!?…])\s+")
+CLAUSE_BREAK = re.compile(r"(?<=[,;:])\s+")
+
+def split_sentences(text, max_chars=150):
+    """
+    Splits text into (segment, ends_sentence) pairs. Sentences longer than
+    `max_chars` are split at clause punctuation (clauses merged back up to
+    `max_chars`), and at a space as a last resort. Segments without a letter
+    (stray punctuation, bare numbers) are dropped: the model has nothing to say.
+    """
+    segments = []
+    for sentence in SENTENCE_BREAK.split(text.strip()):
+        if not sentence:
+            continue
+        parts = []
+        for clause in CLAUSE_BREAK.split(sentence):
+            while len(clause) > max_chars:
+                cut = clause.rfind(" ", 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                parts.append(clause[:cut])
+                clause = clause[cut:].strip()
+            if parts and len(parts[-1]) + len(clause) + 1 <= max_chars:
+                parts[-1] = f"{parts[-1]} {clause}"
+            elif clause:
+                parts.append(clause)
+        parts = [part for part in parts if any(ch.isalpha() for ch in part)]
+        segments += [(part, i == len(parts) - 1) for i, part in enumerate(parts)]
+    return segments
+
+def even_edges(waveform, sampling_rate, threshold=0.01, fade_seconds=0.01):
+    """Trims leading/trailing silence and fades the edges, so every chunk starts and ends the same way."""
+    voiced = np.flatnonzero(np.abs(waveform) > threshold)
+    if len(voiced) == 0:
+        return waveform[:0]
+    waveform = waveform[voiced[0]:voiced[-1] + 1].copy()
+    fade = min(int(fade_seconds * sampling_rate), len(waveform) // 2)
+    if fade:
+        ramp = np.linspace(0.0, 1.0, fade, dtype=np.float32)
+        waveform[:fade] *= ramp
+        waveform[-fade:] *= ramp[::-1]
+    return waveform
+
+def synthesize_stream(text, model, tokenizer, batch_size=4, lookahead=2, max_chars=150,
+                      sentence_pause=0.25, clause_pause=0.12):
+    """
+    Yields float32 PCM chunks (one per sentence or clause) as soon as each
+    is ready. A background thread synthesizes ahead of the consumer, at most
+    `lookahead` chunks ahead, in padded batches that grow 1, 1, 2, 4, ... up
+    to `batch_size`: the first two segments alone, so neither the first chunk
+    nor the wait for the second pays for a whole batch.
+    Each chunk has its silence trimmed and faded edges, followed by a fixed
+    pause (longer after a sentence than after a clause; none after the last).
+    """
+    segments = split_sentences(text, max_chars)
+    if not segments:
+        return
+    sampling_rate = model.config.sampling_rate
+    pauses = {True: np.zeros(int(sentence_pause * sampling_rate), dtype=np.float32),
+              False: np.zeros(int(clause_pause * sampling_rate), dtype=np.float32)}
+    chunks = queue.Queue(maxsize=lookahead)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def produce():
+        groups, start, size = [], 0, 1
+        while start < len(segments):
+            groups.append(segments[start:start + size])
+            start += size
+            if len(groups) > 1:
+                size = min(size * 2, batch_size)
+        try:
+            done = 0
+            for group in groups:
+                if stop.is_set():
+                    return
+                waveforms = synthesize([segment for segment, _ in group], model, tokenizer)
+                for (_, ends_sentence), waveform in zip(group, waveforms):
+                    done += 1
+                    chunk = even_edges(waveform, sampling_rate)
+                    if done < len(segments):
+                        chunk = np.concatenate([chunk, pauses[ends_sentence]])
+                    put(chunk)
+        except Exception as e:
+            put(e)
+        put(None)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                return
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+    finally:
+        stop.set()  # the consumer stopped early: let the producer exit
+
+def stream_to_wav(text, model, tokenizer, path="output.wav", **options):
+    """
+    Streams `text` into a WAV file; returns (seconds to first audio, total
+    seconds, seconds of audio). First audio is None if `text` has no letters.
+    """
+    start = time.perf_counter()
+    first_audio = None
+    samples = 0
+    with sf.SoundFile(path, "w", samplerate=model.config.sampling_rate, channels=1, subtype="PCM_16") as f:
+        for chunk in synthesize_stream(text, model, tokenizer, **options):
+            if first_audio is None:
+                first_audio = time.perf_counter() - start
+            f.write(chunk)
+            samples += len(chunk)
+    return first_audio, time.perf_counter() - start, samples / model.config.sampling_rate
+
 # ────────────────────────────────
-# 5️⃣ Convert to MP3 - Optional
+# 3️⃣ Save to WAV / MP3
 # ────────────────────────────────
-sound = AudioSegment.from_wav("output.wav")
-sound.export("output.mp3", format="mp3")
+def save_wav(waveform, sampling_rate, path="output.wav"):
+    sf.write(path, waveform, sampling_rate)
+
+def wav_to_mp3(wav_path="output.wav", mp3_path="output.mp3"):
+    """Optional; pydub needs FFmpeg on the PATH."""
+    from pydub import AudioSegment
+    sound = AudioSegment.from_wav(wav_path)
+    sound.export(mp3_path, format="mp3")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vietnamese text-to-speech with facebook/mms-tts-vie.")
+    parser.add_argument("--text", default="Xin chào anh em đến với bài tập của khoá AI Application Engineer")
+    parser.add_argument("--stream", action="store_true",
+                        help="Synthesize sentence by sentence and report time-to-first-audio.")
+    args = parser.parse_args()
+    if not any(ch.isalpha() for ch in args.text):
+        parser.error("--text has no letters, so there is nothing to synthesize")
+
+    model, tokenizer = load_model()
+    # ────────────────────────────────
+    # 4️⃣ Input text
+    # ────────────────────────────────
+    text = args.text
+
+    if args.stream:
+        first_audio, total, audio = stream_to_wav(text, model, tokenizer, "output.wav")
+        print(f"⚡ First audio after {first_audio:.2f}s; all {audio:.1f}s of audio synthesized in {total:.2f}s")
+    else:
+        start = time.perf_counter()
+        waveform = synthesize([text], model, tokenizer)[0]
+        print(f"✅ Waveform generated in {time.perf_counter() - start:.2f}s (first audio = total in one pass)")
+        save_wav(waveform, model.config.sampling_rate, "output.wav")
+    wav_to_mp3("output.wav", "output.mp3")
 
-print("✅ Success! MP3 file saved as: output.mp3")
\ No newline at end of file
+    print("✅ Success! MP3 file saved as: output.mp3")
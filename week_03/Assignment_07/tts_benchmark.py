@@ -0,0 +1,119 @@
+import argparse
+import json
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+
+from ttsPipeline import load_model, synthesize, synthesize_stream
+from tts_server import start_tts_server, warm_up
+
+SENTENCES = [
+    "Xin chào anh em đến với bài tập của khoá AI Application Engineer",
+    "Hôm nay trời đẹp",
+    "Chuyến hàng sẽ được giao vào sáng mai",
+    "Vui lòng giữ máy, nhân viên của chúng tôi sẽ hỗ trợ bạn ngay",
+    "Cảm ơn bạn",
+    "Mô hình chuyển văn bản thành giọng nói chạy trên máy chủ cục bộ",
+    "Bạn có muốn nghe lại tin nhắn này không",
+    "Hệ thống đã ghi nhận yêu cầu của bạn và sẽ phản hồi trong vòng hai mươi bốn giờ",
+]
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(p / 100 * (len(ordered) - 1)))]
+
+
+def post(url, text):
+    request = urllib.request.Request(f"{url}/synthesize", data=json.dumps({"text": text}).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        audio = response.read()
+    return time.perf_counter() - start, len(audio)
+
+
+def run_load(url, requests, concurrency):
+    """Sends `requests` utterances from `concurrency` client threads; returns (seconds, latencies)."""
+    texts = [SENTENCES[i % len(SENTENCES)] for i in range(requests)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = [latency for latency, _ in pool.map(lambda text: post(url, text), texts)]
+    return time.perf_counter() - start, latencies
+
+
+def bench_streaming(model, tokenizer, repeats=3):
+    """
+    Time-to-first-audio, longest wait between chunks and total time for a
+    long passage: one forward pass vs synthesize_stream.
+    """
+    passage = ". ".join(SENTENCES * 2) + "."
+    print(f"\nStreaming a {len(passage)}-character passage (median of {repeats} runs)")
+    one_pass, first, longest_gap, total = [], [], [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        synthesize([passage], model, tokenizer)
+        one_pass.append(time.perf_counter() - start)
+        start = last = time.perf_counter()
+        gap = 0.0
+        for i, _ in enumerate(synthesize_stream(passage, model, tokenizer)):
+            now = time.perf_counter()
+            if i == 0:
+                first.append(now - start)
+            else:
+                gap = max(gap, now - last)
+            last = now
+        longest_gap.append(gap)
+        total.append(time.perf_counter() - start)
+    print(f"  one pass   first audio {percentile(one_pass, 50):6.2f}s   longest gap {'-':>6}    "
+          f"total {percentile(one_pass, 50):6.2f}s")
+    print(f"  streaming  first audio {percentile(first, 50):6.2f}s   longest gap {percentile(longest_gap, 50):6.2f}s   "
+          f"total {percentile(total, 50):6.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Utterances/s and latency of tts_server under concurrent load.")
+    parser.add_argument("--requests", type=int, default=64, help="Utterances per configuration.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8], help="Concurrent clients.")
+    parser.add_argument("--max-batch", type=int, nargs="+", default=[1, 4, 8], help="Server batch limits to compare.")
+    parser.add_argument("--max-wait-ms", type=float, default=20)
+    parser.add_argument("--threads", type=int, help="torch CPU threads (default: torch's choice).")
+    parser.add_argument("--no-streaming", action="store_true", help="Skip the time-to-first-audio comparison.")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    print(f"🖥️ torch {torch.__version__}, {torch.get_num_threads()} CPU threads")
+
+    # What every utterance used to cost: a cold load plus one synthesis
+    start = time.perf_counter()
+    model, tokenizer = load_model()
+    load_seconds = time.perf_counter() - start
+    warm_up(model, tokenizer)
+    start = time.perf_counter()
+    synthesize([SENTENCES[0]], model, tokenizer)
+    print(f"⏱️ Model load {load_seconds:.2f}s; one warm utterance {time.perf_counter() - start:.2f}s\n")
+
+    print(f"{'max_batch':>9} {'clients':>7} {'utt/s':>7} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} "
+          f"{'avg batch':>9} {'RTF':>6}")
+    for max_batch in args.max_batch:
+        for concurrency in args.concurrency:
+            server, url = start_tts_server(model, tokenizer, max_batch=max_batch, max_wait=args.max_wait_ms / 1000)
+            seconds, latencies = run_load(url, args.requests, concurrency)
+            stats = server.batcher.stats()
+            server.shutdown()
+            server.server_close()
+            server.batcher.close()
+            # real-time factor: seconds of model time per second of audio (below 1 is faster than real time)
+            rtf = stats["busy_seconds"] / max(stats["audio_seconds"], 1e-9)
+            print(f"{max_batch:>9} {concurrency:>7} {args.requests / seconds:>7.2f} "
+                  f"{percentile(latencies, 50):>7.2f} {percentile(latencies, 95):>7.2f} "
+                  f"{percentile(latencies, 99):>7.2f} {stats['avg_batch_size']:>9.1f} {rtf:>6.3f}")
+    if not args.no_streaming:
+        bench_streaming(model, tokenizer)
+
+
+if __name__ == "__main__":
+    main()
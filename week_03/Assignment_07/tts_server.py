@@ -0,0 +1,203 @@
+import argparse
+import io
+import json
+import queue
+import threading
+import time
+import wave
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import torch
+
+from ttsPipeline import load_model, synthesize
+
+# ────────────────────────────────
+# 1️⃣ Micro-batching
+# ────────────────────────────────
+class MicroBatcher:
+    """
+    Runs concurrent synthesis requests through the warm model together.
+    A worker thread takes the first waiting request, collects more for up
+    to `max_wait` seconds (at most `max_batch`, and stops early once the
+    padded batch reaches `max_batch_chars`), then synthesizes them in one
+    padded forward pass. Each submit() returns a Future for its waveform.
+    """
+
+    def __init__(self, model, tokenizer, max_batch=8, max_wait=0.02, max_batch_chars=4000):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_batch_chars = max_batch_chars
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.utterances = 0
+        self.busy_seconds = 0.0
+        self.audio_seconds = 0.0
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def submit(self, text):
+        future = Future()
+        self.queue.put((text, future))
+        return future
+
+    def close(self):
+        self.queue.put(None)
+        self.worker.join()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "batches": self.batches,
+                "utterances": self.utterances,
+                "avg_batch_size": self.utterances / max(self.batches, 1),
+                "busy_seconds": round(self.busy_seconds, 3),
+                "audio_seconds": round(self.audio_seconds, 3),
+            }
+
+    def _collect(self, first):
+        batch = [first]
+        longest = len(first[0])
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch and longest * len(batch) < self.max_batch_chars:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                self.queue.put(None)  # let _run see the shutdown after this batch
+                break
+            batch.append(item)
+            longest = max(longest, len(item[0]))
+        return batch
+
+    def _run(self):
+        while True:
+            first = self.queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            start = time.perf_counter()
+            try:
+                waveforms = synthesize([text for text, _ in batch], self.model, self.tokenizer)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            with self.lock:
+                self.batches += 1
+                self.utterances += len(batch)
+                self.busy_seconds += time.perf_counter() - start
+                self.audio_seconds += sum(len(w) for w in waveforms) / self.model.config.sampling_rate
+            for (_, future), waveform in zip(batch, waveforms):
+                future.set_result(waveform)
+
+# ────────────────────────────────
+# 2️⃣ HTTP API
+# ────────────────────────────────
+def to_wav_bytes(waveform, sampling_rate):
+    """16-bit PCM mono WAV, in memory."""
+    pcm = (np.clip(waveform, -1.0, 1.0) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sampling_rate)
+        f.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+class TTSHandler(BaseHTTPRequestHandler):
+    """POST /synthesize {"text": "..."} -> audio/wav; GET /stats -> batching counters as JSON."""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path != "/stats":
+            self._send(404, json.dumps({"error": "not found"}).encode("utf-8"), "application/json")
+            return
+        self._send(200, json.dumps(self.server.batcher.stats()).encode("utf-8"), "application/json")
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path != "/synthesize":
+            self._send(404, json.dumps({"error": "not found"}).encode("utf-8"), "application/json")
+            return
+        try:
+            text = json.loads(body or b"{}").get("text", "").strip()
+        except (json.JSONDecodeError, AttributeError):
+            text = ""
+        if not text:
+            self._send(400, json.dumps({"error": "expected JSON with a non-empty \"text\""}).encode("utf-8"),
+                       "application/json")
+            return
+        try:
+            waveform = self.server.batcher.submit(text).result(timeout=self.server.timeout_seconds)
+        except Exception as e:
+            self._send(500, json.dumps({"error": str(e)}).encode("utf-8"), "application/json")
+            return
+        self._send(200, to_wav_bytes(waveform, self.server.sampling_rate), "audio/wav")
+
+    def _send(self, status, data, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # one line per utterance would swamp the console under load
+
+
+class TTSHTTPServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer with a longer listen backlog, so a burst of clients is queued rather than refused."""
+    request_queue_size = 256
+    daemon_threads = True
+
+
+def start_tts_server(model, tokenizer, host="127.0.0.1", port=0, timeout_seconds=120, **batcher_options):
+    """Starts the server in a background thread and returns (server, url); server.batcher holds the stats."""
+    server = TTSHTTPServer((host, port), TTSHandler)
+    server.batcher = MicroBatcher(model, tokenizer, **batcher_options)
+    server.sampling_rate = model.config.sampling_rate
+    server.timeout_seconds = timeout_seconds
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def warm_up(model, tokenizer):
+    """The first forward pass allocates and is several times slower; pay for it before taking requests."""
+    start = time.perf_counter()
+    synthesize(["Xin chào", "Xin chào các bạn"], model, tokenizer)
+    print(f"🔥 Warm-up pass took {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Long-lived MMS-TTS synthesis server with micro-batching.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--max-batch", type=int, default=8, help="Most utterances per forward pass.")
+    parser.add_argument("--max-wait-ms", type=float, default=20, help="How long a batch waits for more requests.")
+    parser.add_argument("--threads", type=int, help="torch CPU threads (default: torch's choice).")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    model, tokenizer = load_model()
+    warm_up(model, tokenizer)
+    server, url = start_tts_server(model, tokenizer, args.host, args.port,
+                                   max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000)
+    print(f"🚀 TTS server running at {url} (Ctrl+C to stop)")
+    print(f"   curl -X POST {url}/synthesize -d '{{\"text\": \"Xin chào\"}}' -o hello.wav")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+        server.batcher.close()